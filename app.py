@@ -2,10 +2,13 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, scrolledtext
 import pandas as pd
 import threading
+import asyncio
 import os
+import re
 import sys
 from datetime import datetime
 import webbrowser
+import argparse
 
 # 添加当前目录到Python路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -13,9 +16,12 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 # 导入自定义模块
 from base import get_weibo_list
 from utils.data_processor import WeiboDataProcessor
+from utils.metrics import metrics, profile_session
+from utils.async_crawler import AsyncWeiboCrawler, CrawlLoopThread
+from utils.rate_control import AdaptiveRateController
 
 class WeiboSpiderGUI:
-    def __init__(self, root):
+    def __init__(self, root, profile_dir=None, concurrency=8, max_rate=2.0):
         self.root = root
         self.root.title("🐦 微博数据爬虫分析平台")
         self.root.geometry("1400x900")
@@ -40,6 +46,19 @@ class WeiboSpiderGUI:
         self.df = pd.DataFrame()
         self.is_crawling = False
         
+        # 性能分析输出目录，设置后只对下一次爬取进行采样
+        self.profile_dir = profile_dir
+        self.profile_output = None
+        
+        # 异步爬取：所有爬取共用一个事件循环线程，首次使用时创建
+        self.concurrency = concurrency
+        self.crawl_loop = None
+        self.crawl_future = None
+        
+        # 自适应速率控制：以请求间隔为起点，速率不超过max_rate（次/秒）
+        self.max_rate = max_rate
+        self.rate_controller = None
+        
         # 创建界面
         self.create_widgets()
         
@@ -213,6 +232,16 @@ class WeiboSpiderGUI:
         
         delay_scale.configure(command=self.update_delay_label)
         
+        # 异步并发爬取开关
+        self.async_var = tk.BooleanVar(value=False)
+        async_check = ttk.Checkbutton(delay_frame, text="⚡ 异步并发爬取（多个关键词用逗号分隔）", variable=self.async_var)
+        async_check.grid(row=1, column=0, columnspan=2, sticky=tk.W, pady=(8, 0))
+        
+        # 自适应请求速率开关（使用异步引擎）
+        self.adaptive_var = tk.BooleanVar(value=False)
+        adaptive_check = ttk.Checkbutton(delay_frame, text=f"🎚️ 自适应请求速率（上限 {self.max_rate:g} 次/秒）", variable=self.adaptive_var)
+        adaptive_check.grid(row=2, column=0, columnspan=2, sticky=tk.W, pady=(4, 0))
+        
         # 开始爬取按钮
         self.crawl_button = ttk.Button(control_frame, text="🚀 开始爬取", command=self.start_crawling, style='Primary.TButton')
         self.crawl_button.grid(row=7, column=0, columnspan=2, pady=15, sticky=(tk.W, tk.E), ipady=8)
@@ -278,6 +307,13 @@ class WeiboSpiderGUI:
         # 详细信息标签页
         self.create_detail_tab()
         
+        # 趋势分析标签页
+        self.create_trend_tab()
+        
+        # 性能指标标签页（仅在启用性能统计时显示）
+        if metrics.enabled:
+            self.create_metrics_tab()
+        
         # 筛选控制
         filter_frame = ttk.LabelFrame(data_frame, text="🔍 数据筛选", padding="15")
         filter_frame.grid(row=1, column=0, sticky=(tk.W, tk.E), pady=(0, 15))
@@ -300,6 +336,11 @@ class WeiboSpiderGUI:
         # 刷新按钮
         refresh_button = ttk.Button(filter_frame, text="🔄 刷新筛选", command=self.filter_data, style='Primary.TButton')
         refresh_button.grid(row=0, column=4, ipady=3)
+        
+        # 合并近似重复微博
+        self.collapse_var = tk.BooleanVar(value=False)
+        collapse_check = ttk.Checkbutton(filter_frame, text="🧬 合并重复微博", variable=self.collapse_var, command=self.toggle_collapse)
+        collapse_check.grid(row=1, column=0, columnspan=2, pady=(10, 0), sticky=tk.W)
     
     def create_table_tab(self):
         # 创建数据表格标签页
@@ -354,6 +395,36 @@ class WeiboSpiderGUI:
         detail_frame.columnconfigure(0, weight=1)
         detail_frame.rowconfigure(0, weight=1)
     
+    def create_trend_tab(self):
+        # 创建趋势分析标签页
+        trend_frame = ttk.Frame(self.notebook)
+        self.notebook.add(trend_frame, text="📈 趋势分析")
+        
+        self.trend_text = scrolledtext.ScrolledText(trend_frame, font=self.default_font, wrap=tk.WORD,
+                                                  bg='#ffffff', fg='#333333', selectbackground='#2196F3')
+        self.trend_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        trend_frame.columnconfigure(0, weight=1)
+        trend_frame.rowconfigure(0, weight=1)
+    
+    def create_metrics_tab(self):
+        # 创建性能指标标签页
+        metrics_frame = ttk.Frame(self.notebook)
+        self.notebook.add(metrics_frame, text="⏱️ 性能指标")
+        
+        self.metrics_text = scrolledtext.ScrolledText(metrics_frame, font=('Consolas', 10), wrap=tk.NONE,
+                                                    bg='#ffffff', fg='#333333', selectbackground='#2196F3')
+        self.metrics_text.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        refresh_button = ttk.Button(metrics_frame, text="🔄 刷新指标", command=self.update_metrics, style='Primary.TButton')
+        refresh_button.grid(row=1, column=0, pady=(10, 0), sticky=tk.W, ipady=3)
+        
+        export_button = ttk.Button(metrics_frame, text="💾 导出指标", command=self.export_metrics, style='Success.TButton')
+        export_button.grid(row=1, column=1, pady=(10, 0), sticky=tk.E, ipady=3)
+        
+        metrics_frame.columnconfigure(0, weight=1)
+        metrics_frame.rowconfigure(0, weight=1)
+    
     def create_status_bar(self, parent):
         # 底部状态栏
         status_frame = ttk.Frame(parent)
@@ -390,8 +461,25 @@ class WeiboSpiderGUI:
         self.progress_label.config(text="准备开始爬取...")
         self.status_var.set(f"正在爬取关键词 '{keyword}' 的微博数据...")
         
+        # 自适应速率需要逐个请求的反馈，只有异步引擎支持；只有勾选异步并发时才按逗号拆分多个关键词
+        if self.async_var.get() or self.adaptive_var.get():
+            if self.async_var.get():
+                keywords = list(dict.fromkeys(k.strip() for k in re.split(r'[,，]', keyword) if k.strip()))
+            else:
+                keywords = [keyword]
+            self.start_async_crawl(keywords, self.pages_var.get(), self.delay_var.get(), self.adaptive_var.get())
+            return
+        
         # 在新线程中执行爬取
-        threading.Thread(target=self.crawl_data, daemon=True).start()
+        target = self.profile_crawl if self.profile_dir else self.crawl_data
+        threading.Thread(target=target, daemon=True).start()
+    
+    def profile_crawl(self):
+        """对一次爬取进行 cProfile 和 tracemalloc 采样"""
+        profile_dir, self.profile_dir = self.profile_dir, None
+        with profile_session(profile_dir) as output:
+            self.crawl_data()
+        self.root.after(0, lambda: self.status_var.set(f"{self.status_var.get()}（性能分析结果: {output}.prof）"))
     
     def crawl_data(self):
         try:
@@ -403,21 +491,16 @@ class WeiboSpiderGUI:
             self.root.after(0, lambda: self.progress_label.config(text=f"开始爬取，请求间隔: {delay:.1f}秒"))
             
             # 调用爬取函数（传入自定义延迟）
-            df = get_weibo_list(keyword, max_pages, delay)
+            with metrics.timer('fetch'):
+                df = get_weibo_list(keyword, max_pages, delay)
+            metrics.count('rows_fetched', len(df))
             
             if not self.is_crawling:  # 检查是否被停止
                 return
             
-            if not df.empty:
-                self.df = df
-                # 在主线程中更新UI
-                self.root.after(0, self.update_display)
-                self.root.after(0, lambda: self.progress_label.config(text="爬取完成"))
-                self.root.after(0, lambda: self.status_var.set(f"✅ 成功爬取 {len(df)} 条微博数据！"))
-            else:
-                self.root.after(0, lambda: self.progress_label.config(text="未获取到数据"))
-                self.root.after(0, lambda: self.status_var.set("⚠️ 未获取到数据，请尝试更换关键词"))
-                self.root.after(0, lambda: messagebox.showwarning("警告", "未获取到数据，请尝试更换关键词或检查网络连接"))
+            df, processor = self.prepare_crawled_data({keyword: df})
+            # 在主线程中更新UI
+            self.root.after(0, self.show_crawl_result, df, processor)
                 
         except Exception as e:
             if self.is_crawling:  # 只有在未被停止时才显示错误
@@ -428,8 +511,107 @@ class WeiboSpiderGUI:
         finally:
             self.root.after(0, self.finish_crawling)
     
+    def start_async_crawl(self, keywords, max_pages, delay, adaptive=False):
+        """在事件循环线程中并发爬取多个关键词，完成后通过 root.after 回到主线程"""
+        if self.crawl_loop is None:
+            self.crawl_loop = CrawlLoopThread(self.root)
+        self.rate_controller = AdaptiveRateController(delay, max_rate=self.max_rate) if adaptive else None
+        self.progress_label.config(text=f"开始异步爬取 {len(keywords)} 个关键词，并发数: {self.concurrency}")
+        coro = self.crawl_data_async(keywords, max_pages, delay)
+        if self.profile_dir:
+            profile_dir, self.profile_dir = self.profile_dir, None
+            coro = self.profile_crawl_async(coro, profile_dir)
+        self.crawl_future = self.crawl_loop.submit(coro, self.finish_async_crawl)
+    
+    async def profile_crawl_async(self, coro, profile_dir):
+        """对一次异步爬取进行 cProfile 和 tracemalloc 采样（只统计事件循环线程）"""
+        with profile_session(profile_dir) as output:
+            result = await coro
+        # 由 finish_async_crawl 在显示结果后追加到状态栏
+        self.profile_output = output
+        return result
+    
+    async def crawl_data_async(self, keywords, max_pages, delay):
+        """异步爬取并预处理数据（在事件循环线程中执行）"""
+        # 自适应模式下被限流的请求由控制器降速后重试，多给几次机会避免丢页
+        crawler = AsyncWeiboCrawler(delay=delay, concurrency=self.concurrency, controller=self.rate_controller,
+                                    retries=5 if self.rate_controller is not None else 2)
+        with metrics.timer('fetch'):
+            frames = await crawler.crawl_many(keywords, max_pages, on_progress=self.report_crawl_progress)
+        metrics.count('rows_fetched', sum(len(df) for df in frames.values()))
+        
+        if not self.is_crawling:  # 检查是否被停止
+            return None
+        # 去重和写入汇总耗时较长，放到线程池中执行，避免阻塞事件循环（停止爬取时可以立即取消等待）
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.prepare_crawled_data, frames)
+    
+    def report_crawl_progress(self, done, total):
+        text = f"已爬取 {done}/{total} 页"
+        if self.rate_controller is not None:
+            text += f"，当前速率 {self.rate_controller.describe()}"
+        self.root.after(0, lambda: self.progress_label.config(text=text))
+    
+    def finish_async_crawl(self, future):
+        """异步爬取结束后在主线程中显示结果"""
+        if future is not self.crawl_future:  # 已被停止，结果作废
+            return
+        self.crawl_future = None
+        
+        try:
+            result = future.result()
+            if result is not None:
+                self.show_crawl_result(*result)
+        except Exception as e:
+            error_msg = f"爬取过程中出现错误：{str(e)}"
+            self.progress_label.config(text="爬取出错")
+            self.status_var.set(f"❌ {error_msg}")
+            messagebox.showerror("错误", error_msg)
+        finally:
+            self.finish_crawling()
+            if self.profile_output:
+                self.status_var.set(f"{self.status_var.get()}（性能分析结果: {self.profile_output}.prof）")
+                self.profile_output = None
+    
+    def prepare_crawled_data(self, frames):
+        """合并各关键词的爬取结果，标记近似重复并写入汇总结构（在后台线程中执行）
+        
+        使用新的数据处理器，由主线程在显示结果时替换，界面线程读取的处理器不会被后台线程修改。
+        """
+        processor = WeiboDataProcessor()
+        frames = {keyword: df for keyword, df in frames.items() if not df.empty}
+        if not frames:
+            return pd.DataFrame(), processor
+        
+        df = pd.concat(frames.values(), ignore_index=True)
+        if len(frames) > 1:
+            # 同一条微博可能出现在多个关键词的结果中
+            df = df.drop_duplicates('微博id', ignore_index=True)
+        # 标记近似重复微博（签名计算较耗时，放在后台线程中完成）
+        df = processor.assign_duplicate_clusters(df)
+        # 写入时间桶汇总，供趋势分析使用
+        for keyword, frame in frames.items():
+            processor.ingest(frame, keyword)
+        return df, processor
+    
+    def show_crawl_result(self, df, processor):
+        """在主线程中显示爬取结果"""
+        if not df.empty:
+            self.df = df
+            self.processor = processor
+            self.update_display()
+            self.progress_label.config(text="爬取完成")
+            self.status_var.set(f"✅ 成功爬取 {len(df)} 条微博数据！")
+        else:
+            self.progress_label.config(text="未获取到数据")
+            self.status_var.set("⚠️ 未获取到数据，请尝试更换关键词")
+            messagebox.showwarning("警告", "未获取到数据，请尝试更换关键词或检查网络连接")
+    
     def stop_crawling(self):
         self.is_crawling = False
+        if self.crawl_future is not None:
+            self.crawl_future.cancel()
+            self.crawl_future = None
         self.finish_crawling()
         self.progress_label.config(text="爬取已停止")
         self.status_var.set("⏹️ 爬取已停止")
@@ -439,14 +621,21 @@ class WeiboSpiderGUI:
         self.crawl_button.config(state=tk.NORMAL)
         self.stop_button.config(state=tk.DISABLED)
         self.progress.stop()
+        self.update_metrics()
     
     def update_display(self):
         """更新数据显示"""
         if self.df.empty:
             return
         
-        # 更新表格
-        self.update_table()
+        # 更新筛选选项
+        self.update_filters()
+        
+        # 更新表格（合并重复微博时走筛选流程）
+        if self.collapse_var.get():
+            self.filter_data()
+        else:
+            self.update_table()
         
         # 更新统计信息
         self.update_stats()
@@ -454,8 +643,8 @@ class WeiboSpiderGUI:
         # 更新详细信息
         self.update_details()
         
-        # 更新筛选选项
-        self.update_filters()
+        # 更新趋势分析
+        self.update_trend()
         
         # 启用导出和清空按钮
         self.export_csv_button.config(state=tk.NORMAL)
@@ -464,31 +653,34 @@ class WeiboSpiderGUI:
     
     def update_table(self):
         """更新数据表格"""
-        # 清空现有数据
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # 添加新数据
-        for index, row in self.df.iterrows():
-            content = str(row['微博内容'])[:50] + "..." if len(str(row['微博内容'])) > 50 else str(row['微博内容'])
-            values = (
-                row['微博作者'],
-                content,
-                row['发布时间'],
-                row['转发数'],
-                row['评论数'],
-                row['点赞数']
-            )
-            # 交替行颜色
-            row_tag = 'evenrow' if index % 2 == 0 else 'oddrow'
-            self.tree.insert('', tk.END, values=values, tags=(index, row_tag))
+        with metrics.timer('render'):
+            # 清空现有数据
+            for item in self.tree.get_children():
+                self.tree.delete(item)
+            
+            # 添加新数据
+            for index, row in self.df.iterrows():
+                content = str(row['微博内容'])[:50] + "..." if len(str(row['微博内容'])) > 50 else str(row['微博内容'])
+                values = (
+                    row['微博作者'],
+                    content,
+                    row['发布时间'],
+                    row['转发数'],
+                    row['评论数'],
+                    row['点赞数']
+                )
+                # 交替行颜色
+                row_tag = 'evenrow' if index % 2 == 0 else 'oddrow'
+                self.tree.insert('', tk.END, values=values, tags=(index, row_tag))
+        metrics.count('rows_rendered', len(self.df))
     
     def update_stats(self):
         """更新统计信息"""
         if self.df.empty:
             return
         
-        stats = self.processor.get_basic_stats(self.df)
+        with metrics.timer('stats'):
+            stats = self.processor.get_basic_stats(self.df, collapse=self.collapse_var.get())
         
         stats_text = "📊 数据统计信息\n" + "="*30 + "\n\n"
         stats_text += f"总微博数: {stats.get('总微博数', 0)} 条\n\n"
@@ -501,6 +693,23 @@ class WeiboSpiderGUI:
         stats_text += f"最热微博转发数: {stats.get('最热微博转发数', 0)}\n"
         stats_text += f"最热微博评论数: {stats.get('最热微博评论数', 0)}\n"
         stats_text += f"最热微博点赞数: {stats.get('最热微博点赞数', 0)}\n"
+        if '合并重复微博数' in stats:
+            stats_text += f"\n已合并重复微博: {stats['合并重复微博数']} 条\n"
+        
+        # 最热微博及活跃作者：默认读取流式排行榜，合并重复时按合并后的数据计算
+        collapsed = self.processor.collapse_duplicates(self.df) if self.collapse_var.get() else None
+        suffix = "（已合并重复）" if collapsed is not None else ""
+        hot_posts = self.processor.get_top_posts('互动数', 1, df=collapsed)
+        if hot_posts is not None:
+            hot = hot_posts.iloc[0]
+            stats_text += f"\n🔥 最热微博{suffix}: @{hot['微博作者']}（互动 {hot['互动数']:,}）\n"
+            stats_text += f"{str(hot['微博内容'])[:30]}\n"
+        
+        top_authors = self.processor.get_top_authors('微博数', 5, df=collapsed)
+        if top_authors is not None:
+            stats_text += f"\n👤 活跃作者 Top5{suffix}\n"
+            for author, row in top_authors.iterrows():
+                stats_text += f"{author}: {row['微博数']} 条\n"
         
         self.stats_text.delete(1.0, tk.END)
         self.stats_text.insert(1.0, stats_text)
@@ -527,6 +736,47 @@ class WeiboSpiderGUI:
         self.detail_text.delete(1.0, tk.END)
         self.detail_text.insert(1.0, detail_text)
     
+    def update_trend(self):
+        """更新趋势分析"""
+        daily = self.processor.get_trend(days=30, resolution='day')
+        if daily is None:
+            return
+        
+        trend_text = "📈 发布趋势分析\n" + "="*50 + "\n\n"
+        
+        trend_text += "📅 最近30天（按天）\n"
+        for day, row in daily[daily['微博数'] > 0].iterrows():
+            trend_text += f"{day.strftime('%Y-%m-%d')}  微博 {row['微博数']} | 转发 {row['转发数']} | 评论 {row['评论数']} | 点赞 {row['点赞数']}\n"
+        
+        totals = self.processor.get_period_totals()
+        if totals is not None:
+            trend_text += "\n📊 近期汇总（截至最新微博）\n"
+            for period, row in totals.iterrows():
+                trend_text += f"{period}  微博 {row['微博数']} | 转发 {row['转发数']} | 评论 {row['评论数']} | 点赞 {row['点赞数']}\n"
+        
+        hour_of_day = self.processor.get_time_distribution()
+        if hour_of_day is not None:
+            trend_text += "\n🕐 发布时段分布\n"
+            for hour, count in hour_of_day.items():
+                trend_text += f"{hour:02d}:00  {count}\n"
+        
+        hourly = self.processor.get_trend(days=1, resolution='hour')
+        if hourly is not None:
+            trend_text += "\n🕒 最近一天（按小时）\n"
+            for hour, row in hourly[hourly['微博数'] > 0].iterrows():
+                trend_text += f"{hour.strftime('%m-%d %H:00')}  微博 {row['微博数']} | 互动 {row['转发数'] + row['评论数'] + row['点赞数']}\n"
+        
+        spikes = self.processor.get_spikes(days=7, resolution='hour')
+        trend_text += "\n🔥 发布突增时段\n"
+        if spikes is None or spikes.empty:
+            trend_text += "未检测到明显突增\n"
+        else:
+            for _, row in spikes.iterrows():
+                trend_text += f"{row['时间'].strftime('%m-%d %H:00')}  微博 {row['微博数']}（基线 {row['基线']}，z={row['z分数']}）\n"
+        
+        self.trend_text.delete(1.0, tk.END)
+        self.trend_text.insert(1.0, trend_text)
+    
     def update_filters(self):
         """更新筛选选项"""
         if self.df.empty:
@@ -542,42 +792,48 @@ class WeiboSpiderGUI:
         if self.df.empty:
             return
         
-        filtered_df = self.df.copy()
-        
-        # 按作者筛选
         author = self.author_var.get()
-        if author != '全部':
-            filtered_df = filtered_df[filtered_df['微博作者'] == author]
-        
-        # 按互动数筛选
-        min_engagement = self.min_engagement_var.get()
-        if min_engagement > 0:
-            total_engagement = filtered_df['转发数'] + filtered_df['评论数'] + filtered_df['点赞数']
-            filtered_df = filtered_df[total_engagement >= min_engagement]
+        with metrics.timer('filter'):
+            filtered_df = self.processor.filter_posts(
+                self.df,
+                author=None if author == '全部' else author,
+                min_engagement=self.min_engagement_var.get(),
+                collapse=self.collapse_var.get()
+            )
         
         # 更新表格显示
         self.update_filtered_table(filtered_df)
     
+    def toggle_collapse(self):
+        """切换是否合并近似重复微博"""
+        if self.df.empty:
+            return
+        
+        self.filter_data()
+        self.update_stats()
+    
     def update_filtered_table(self, df):
         """更新筛选后的表格"""
-        # 清空现有数据
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # 添加筛选后的数据
-        for display_index, (index, row) in enumerate(df.iterrows()):
-            content = str(row['微博内容'])[:50] + "..." if len(str(row['微博内容'])) > 50 else str(row['微博内容'])
-            values = (
-                row['微博作者'],
-                content,
-                row['发布时间'],
-                row['转发数'],
-                row['评论数'],
-                row['点赞数']
-            )
-            # 交替行颜色
-            row_tag = 'evenrow' if display_index % 2 == 0 else 'oddrow'
-            self.tree.insert('', tk.END, values=values, tags=(index, row_tag))
+        with metrics.timer('render'):
+            # 清空现有数据
+            for item in self.tree.get_children():
+                self.tree.delete(item)
+            
+            # 添加筛选后的数据
+            for display_index, (index, row) in enumerate(df.iterrows()):
+                content = str(row['微博内容'])[:50] + "..." if len(str(row['微博内容'])) > 50 else str(row['微博内容'])
+                values = (
+                    row['微博作者'],
+                    content,
+                    row['发布时间'],
+                    row['转发数'],
+                    row['评论数'],
+                    row['点赞数']
+                )
+                # 交替行颜色
+                row_tag = 'evenrow' if display_index % 2 == 0 else 'oddrow'
+                self.tree.insert('', tk.END, values=values, tags=(index, row_tag))
+        metrics.count('rows_rendered', len(df))
     
     def open_weibo_link(self, event):
         """双击打开微博链接"""
@@ -606,7 +862,8 @@ class WeiboSpiderGUI:
         
         if filename:
             try:
-                self.df.to_csv(filename, index=False, encoding='utf-8-sig')
+                with metrics.timer('export'):
+                    self.df.to_csv(filename, index=False, encoding='utf-8-sig')
                 messagebox.showinfo("成功", f"数据已导出到: {filename}")
             except Exception as e:
                 messagebox.showerror("错误", f"导出失败: {str(e)}")
@@ -625,11 +882,37 @@ class WeiboSpiderGUI:
         
         if filename:
             try:
-                self.df.to_excel(filename, index=False)
+                with metrics.timer('export'):
+                    self.df.to_excel(filename, index=False)
                 messagebox.showinfo("成功", f"数据已导出到: {filename}")
             except Exception as e:
                 messagebox.showerror("错误", f"导出失败: {str(e)}")
     
+    def update_metrics(self):
+        """更新性能指标"""
+        if not metrics.enabled:
+            return
+        
+        metrics_text = "⏱️ 各阶段耗时统计\n" + "="*70 + "\n\n" + metrics.format_table() + "\n"
+        
+        self.metrics_text.delete(1.0, tk.END)
+        self.metrics_text.insert(1.0, metrics_text)
+    
+    def export_metrics(self):
+        """导出性能指标（JSON 或 Prometheus 文本格式）"""
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("JSON files", "*.json"), ("Prometheus text", "*.prom")],
+            initialfile=f"性能指标_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        )
+        
+        if filename:
+            try:
+                metrics.dump(filename)
+                messagebox.showinfo("成功", f"性能指标已导出到: {filename}")
+            except Exception as e:
+                messagebox.showerror("错误", f"导出失败: {str(e)}")
+    
     def clear_data(self):
         """清空数据"""
         if messagebox.askyesno("确认", "确定要清空所有数据吗？"):
@@ -642,6 +925,7 @@ class WeiboSpiderGUI:
             # 清空文本区域
             self.stats_text.delete(1.0, tk.END)
             self.detail_text.delete(1.0, tk.END)
+            self.trend_text.delete(1.0, tk.END)
             
             # 禁用按钮
             self.export_csv_button.config(state=tk.DISABLED)
@@ -652,6 +936,9 @@ class WeiboSpiderGUI:
             self.author_combo['values'] = ['全部']
             self.author_combo.set('全部')
             self.min_engagement_var.set(0)
+            self.collapse_var.set(False)
+            self.processor.dedup.clear()
+            self.processor.reset()
             
             self.status_var.set("数据已清空")
     
@@ -670,16 +957,20 @@ class WeiboSpiderGUI:
 - 🔍 搜索关键词：支持中文、英文、话题等
 - 📄 爬取页数：每页约10-20条微博，建议不超过20页
 - ⏱️ 请求间隔：默认2秒，网络较差时可增加到5-10秒
+- ⚡ 异步并发爬取：在一个后台线程中并发请求多页，可同时爬取多个用逗号分隔的关键词，所有请求共享请求间隔
+- 🎚️ 自适应请求速率：以请求间隔为起点自动调速，请求顺利时逐步加快，遇到限流(418/429)、空页或响应变慢时降速，进度栏显示当前速率
 
 🔍 数据筛选功能：
 - 👤 按作者筛选：查看特定用户的所有微博
 - 💬 按互动数筛选：筛选热门微博（转发+评论+点赞）
 - 🔄 实时筛选：立即预览筛选结果
+- 🧬 合并重复微博：将转发、复制粘贴的近似重复内容合并为一条，统计同步去重
 
 📊 数据查看方式：
 - 📋 表格页面：查看所有微博的核心信息
 - 📝 详细信息：查看前10条微博的完整内容
 - 🔗 双击表格行：直接打开微博链接
+- 📈 趋势分析：按天/小时查看发布量和互动量，自动标出发布突增时段
 
 💾 数据导出：
 - 📄 CSV格式：适合Excel、数据分析工具
@@ -689,7 +980,8 @@ class WeiboSpiderGUI:
 📈 统计信息：
 - 总体数据：微博总数、互动数统计
 - 平均数据：平均转发、评论、点赞数
-- 热门数据：最热微博的各项指标
+- 热门数据：最热微博的各项指标及作者、内容
+- 排行榜：活跃作者和热门微博随爬取实时更新
 
 ⚠️ 重要提醒：
 - 🕒 合理设置间隔：避免请求过于频繁
@@ -730,8 +1022,18 @@ class WeiboSpiderGUI:
         close_button.pack(pady=(15, 0), ipady=5)
 
 def main():
+    parser = argparse.ArgumentParser(description="微博数据爬虫分析平台")
+    parser.add_argument('--metrics', action='store_true', help="启用各阶段耗时统计并显示性能指标标签页")
+    parser.add_argument('--profile', metavar='DIR', help="对下一次爬取进行 cProfile/tracemalloc 采样，结果写入DIR")
+    parser.add_argument('--concurrency', type=int, default=8, help="异步爬取时同时进行的最大请求数（默认8）")
+    parser.add_argument('--max-rate', type=float, default=2.0, help="自适应请求速率的上限（次/秒，默认2）")
+    args = parser.parse_args()
+    
+    if args.metrics:
+        metrics.enabled = True
+    
     root = tk.Tk()
-    app = WeiboSpiderGUI(root)
+    app = WeiboSpiderGUI(root, profile_dir=args.profile, concurrency=args.concurrency, max_rate=args.max_rate)
     
     # 居中显示窗口
     root.update_idletasks()
@@ -742,6 +1044,10 @@ def main():
     root.geometry(f"{width}x{height}+{x}+{y}")
     
     root.mainloop()
+    
+    # 窗口关闭后取消未完成的异步爬取并停止事件循环线程
+    if app.crawl_loop is not None:
+        app.crawl_loop.stop()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,196 @@
+"""合成微博数据生成器
+
+生成带有中文内容、话题、@提及、相对时间和长尾互动数的微博，
+并可渲染为与 s.weibo.com 搜索结果页结构一致的HTML，或 m.weibo.cn 接口格式的JSON。
+同一个种子总是生成相同的数据，便于多次基准测试之间对比。
+"""
+import json
+import zlib
+import random
+import html
+from datetime import datetime, timedelta
+
+COLUMNS = ['微博id', '微博作者', '微博内容', '发布时间', '转发数', '评论数', '点赞数', 'url']
+
+_SUBJECTS = ['我', '大家', '朋友们', '老板', '同事', '室友', '网友', '博主', '官方', '记者']
+_VERBS = ['觉得', '认为', '刚刚发现', '终于知道', '一直在想', '强烈推荐', '不太理解', '正在学习', '分享一下', '吐槽一下']
+_OBJECTS = [
+    '这家店的咖啡真的很好喝', 'Python写爬虫太方便了', '今天的天气适合出去走走', '新出的手机值不值得买',
+    '这部电影的结局有点意外', '周末去爬山的路线', '人工智能会不会取代程序员', '数据分析入门的学习路径',
+    '地铁上的新广告', '春天的樱花已经开了', '考研复习的经验', '年终总结怎么写', '自己做的红烧肉',
+    '城市夜景的拍摄技巧', '最近在读的一本书', '宠物猫的日常', '新能源汽车的续航', '家里装修的预算',
+]
+_TAILS = ['', '，太真实了', '，你们怎么看？', '！', '……', '，求推荐', '，已经三天了', '，冲鸭', '，笑死']
+_TOPICS = ['#今日热点#', '#Python#', '#人工智能#', '#周末去哪儿#', '#美食日记#', '#读书打卡#', '#考研#', '#数码#']
+_EMOTICONS = ['[哈哈]', '[doge]', '[赞]', '[泪]', '[心]', '[吃瓜]', '']
+_SOURCES = ['iPhone客户端', 'Android', '微博 weibo.com', 'HUAWEI Mate', '小米手机']
+
+# 互动数超过一万时网页显示为"1.2万"，生成的真实值按显示精度取整，保证解析结果可以精确比对
+_WAN = 10000
+
+
+def _engagement(rng, scale):
+    value = int(rng.paretovariate(1.3) * scale) - scale
+    if value >= _WAN:
+        value = round(value / 1000) * 1000
+    return max(value, 0)
+
+
+def format_count(value, label):
+    """把互动数格式化为网页上的显示文本"""
+    if value == 0:
+        return label
+    if value >= _WAN:
+        text = f"{value / _WAN:.1f}".rstrip('0').rstrip('.')
+        return f"{text}万"
+    return str(value)
+
+
+def _relative_time(now, age_seconds):
+    published = now - timedelta(seconds=age_seconds)
+    if age_seconds < 60:
+        return '刚刚'
+    if age_seconds < 3600:
+        return f"{age_seconds // 60}分钟前"
+    if published.date() == now.date():
+        return published.strftime('今天 %H:%M')
+    if published.year == now.year:
+        return published.strftime('%m月%d日 %H:%M')
+    return published.strftime('%Y年%m月%d日 %H:%M')
+
+
+class WeiboGenerator:
+    """合成微博生成器"""
+
+    def __init__(self, seed=0, authors=5000, repost_rate=0.15, now=None, span_days=30):
+        self.rng = random.Random(seed)
+        self.now = now or datetime(2024, 6, 1, 12, 0, 0)
+        self.span_seconds = span_days * 86400
+        self.repost_rate = repost_rate
+        self.authors = [f"{self.rng.choice(['小', '阿', '老', '大', ''])}"
+                        f"{self.rng.choice(_OBJECTS)[:2]}{self.rng.randrange(10000)}" for _ in range(authors)]
+        self._next_id = 4900000000000000 + seed * 10000000
+        self._recent = []
+
+    def _author(self):
+        # 作者活跃度近似服从Zipf分布
+        index = min(int((self.rng.paretovariate(1.0) - 1) * 20), len(self.authors) - 1)
+        return self.authors[index]
+
+    def _content(self):
+        rng = self.rng
+        parts = []
+        if rng.random() < 0.4:
+            parts.append(rng.choice(_TOPICS))
+        parts.append(rng.choice(_SUBJECTS) + rng.choice(_VERBS) + rng.choice(_OBJECTS) + rng.choice(_TAILS))
+        if rng.random() < 0.3:
+            parts.append(rng.choice(_SUBJECTS) + rng.choice(_VERBS) + rng.choice(_OBJECTS))
+        if rng.random() < 0.2:
+            parts.append(f"@{self._author()}")
+        if rng.random() < 0.1:
+            parts.append(f"http://t.cn/A{rng.randrange(36 ** 5):06x}")
+        parts.append(rng.choice(_EMOTICONS))
+        return ' '.join(part for part in parts if part)
+
+    def post(self):
+        """生成一条微博（列与爬虫输出一致）"""
+        rng = self.rng
+        self._next_id += rng.randrange(1, 1000)
+        mid = str(self._next_id)
+        author = self._author()
+
+        # 一部分微博是对近期微博的转发或轻微改写，用于近似重复检测
+        if self._recent and rng.random() < self.repost_rate:
+            original = rng.choice(self._recent)
+            content = f"//@{original['微博作者']}: {original['微博内容']}"
+            if rng.random() < 0.5:
+                content = rng.choice(_TAILS) + content
+        else:
+            content = self._content()
+
+        age = int(rng.random() ** 2 * self.span_seconds)
+        post = {
+            '微博id': mid,
+            '微博作者': author,
+            '微博内容': content,
+            '发布时间': _relative_time(self.now, age),
+            '转发数': _engagement(rng, 20),
+            '评论数': _engagement(rng, 30),
+            '点赞数': _engagement(rng, 80),
+            'url': f"https://weibo.com/{zlib.crc32(author.encode('utf-8'))}/{mid}",
+        }
+        self._recent.append(post)
+        if len(self._recent) > 200:
+            self._recent.pop(0)
+        return post
+
+    def posts(self, count):
+        return [self.post() for _ in range(count)]
+
+    def frame(self, count):
+        """生成count条微博的DataFrame"""
+        import pandas as pd
+        return pd.DataFrame(self.posts(count), columns=COLUMNS)
+
+
+def render_search_page(posts, page=1, has_next=True):
+    """渲染为 s.weibo.com 搜索结果页结构的HTML"""
+    escape = html.escape
+    cards = []
+    for post in posts:
+        author = escape(post['微博作者'])
+        uid, _, mid = post['url'].rpartition('/')
+        uid = uid.rsplit('/', 1)[-1]
+        cards.append(f'''
+<div class="card-wrap" action-type="feed_list_item" mid="{post['微博id']}">
+  <div class="card">
+    <div class="card-feed">
+      <div class="content" node-type="like">
+        <div class="info">
+          <div><a href="//weibo.com/{uid}?refer_flag=1001030103_" class="name" target="_blank" nick-name="{author}">{author}</a></div>
+        </div>
+        <p class="txt" node-type="feed_list_content" nick-name="{author}">{escape(post['微博内容'])}</p>
+        <div class="from">
+          <a href="//weibo.com/{uid}/{mid}?refer_flag=1001030103_" target="_blank">{post['发布时间']}</a>
+          来自 <a href="//app.weibo.com/" rel="nofollow">{_SOURCES[int(post['微博id']) % len(_SOURCES)]}</a>
+        </div>
+      </div>
+    </div>
+    <div class="card-act">
+      <ul>
+        <li><a href="javascript:void(0);" action-type="feed_list_forward"><i class="woo-font woo-font--retweet"></i> {format_count(post['转发数'], '转发')}</a></li>
+        <li><a href="javascript:void(0);" action-type="feed_list_comment"><i class="woo-font woo-font--comment"></i> {format_count(post['评论数'], '评论')}</a></li>
+        <li><a href="javascript:void(0);" action-type="feed_list_like"><button class="woo-like-main"><span class="woo-like-count">{format_count(post['点赞数'], '赞')}</span></button></a></li>
+      </ul>
+    </div>
+  </div>
+</div>''')
+
+    if not cards:
+        cards.append('<div class="card card-no-result s-pt20b40"><p>抱歉，未找到相关结果。</p></div>')
+    next_link = f'<a class="next" href="/weibo?page={page + 1}">下一页</a>' if has_next else ''
+    return (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>微博搜索</title></head><body>'
+            f'<div id="pl_feedlist_index">{"".join(cards)}</div>'
+            f'<div class="m-page"><span class="list">第{page}页</span>{next_link}</div></body></html>')
+
+
+def render_api_page(posts):
+    """渲染为 m.weibo.cn 搜索接口格式的JSON"""
+    cards = []
+    for post in posts:
+        uid, _, mid = post['url'].rpartition('/')
+        cards.append({
+            'card_type': 9,
+            'mblog': {
+                'id': post['微博id'],
+                'mid': post['微博id'],
+                'bid': mid,
+                'text': html.escape(post['微博内容']),
+                'created_at': post['发布时间'],
+                'reposts_count': post['转发数'],
+                'comments_count': post['评论数'],
+                'attitudes_count': post['点赞数'],
+                'user': {'id': int(uid.rsplit('/', 1)[-1]), 'screen_name': post['微博作者']},
+            },
+        })
+    return json.dumps({'ok': 1 if cards else 0, 'data': {'cards': cards}}, ensure_ascii=False)
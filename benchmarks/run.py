@@ -0,0 +1,365 @@
+"""离线基准测试
+
+    python -m benchmarks.run                           # 运行全部场景，结果写入 benchmarks/results/
+    python -m benchmarks.run --sizes 1000,1000000 --scenarios stats,filter
+    python -m benchmarks.run --compare latest          # 与上一次结果对比，标出性能回退
+
+所有数据来自合成生成器和本地桩服务器，不访问真实站点；同样的参数每次生成相同的数据。
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import platform
+import argparse
+import subprocess
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generator import WeiboGenerator, render_search_page, render_api_page
+from benchmarks.stub_server import StubWeiboServer
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+SCENARIOS = ('crawl', 'throttle', 'parse', 'stats', 'sharded', 'filter', 'render')
+
+
+def measure(func, repeat=3):
+    """多次执行func，返回最短耗时（秒）和最后一次的返回值"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+class BenchmarkRun:
+    """一次基准测试运行，收集各场景的结果"""
+
+    def __init__(self, sizes, repeat=3, seed=0):
+        self.sizes = sizes
+        self.repeat = repeat
+        self.seed = seed
+        self.results = []
+        self._frames = {}
+
+    def record(self, scenario, case, size, seconds, unit='rows', **extra):
+        result = {
+            'scenario': scenario,
+            'case': case,
+            'size': size,
+            'seconds': round(seconds, 6),
+            'throughput': round(size / seconds, 2) if seconds > 0 else None,
+            'unit': f'{unit}/s',
+        }
+        result.update(extra)
+        self.results.append(result)
+        print(f"  {scenario:<10}{case:<28}{size:>10,}{seconds:>12.4f}s"
+              f"{result['throughput'] or 0:>16,.0f} {unit}/s")
+
+    def frame(self, size):
+        """生成（并缓存）size条微博的DataFrame"""
+        if size not in self._frames:
+            self._frames[size] = WeiboGenerator(seed=self.seed).frame(size)
+        return self._frames[size]
+
+    def run_crawl(self, pages=20, latency=0.02):
+        """从桩服务器抓取搜索页，分别测量顺序抓取和异步并发抓取的吞吐量"""
+        import requests
+        from utils.parser import WeiboPageParser, ColumnBuffers
+        from utils.async_crawler import AsyncWeiboCrawler
+
+        with StubWeiboServer(latency=latency, seed=self.seed) as server:
+            session = requests.Session()
+            parser = WeiboPageParser()
+
+            def crawl():
+                buffers = ColumnBuffers()
+                for page in range(1, pages + 1):
+                    response = session.get(f"{server.url}/weibo", params={'q': 'python', 'page': page}, timeout=10)
+                    response.raise_for_status()
+                    parser.parse(response.text, buffers)
+                return len(buffers.to_frame())
+
+            seconds, rows = measure(crawl, self.repeat)
+            self.record('crawl', f'sequential_{int(latency * 1000)}ms', pages, seconds, unit='pages', rows=rows)
+
+            for concurrency in (8, 64):
+                crawler = AsyncWeiboCrawler(delay=0, concurrency=concurrency, base_url=server.url)
+                seconds, rows = measure(lambda: len(asyncio.run(crawler.crawl('python', pages))), self.repeat)
+                self.record('crawl', f'async_c{concurrency}_{int(latency * 1000)}ms', pages, seconds,
+                            unit='pages', rows=rows)
+
+    def run_throttle(self, pages=60, rate_limit=10.0):
+        """对限流的桩服务器爬取，比较固定请求间隔和自适应速率控制
+
+        桩服务器每秒只允许rate_limit个请求，超出时返回418（hard）或空结果页（silent）。
+        过快的固定间隔会频繁被限流，过慢的固定间隔浪费吞吐量，自适应控制应接近限流速率且不丢页。
+        自适应控制器除速率上限外使用与界面相同的默认参数。
+        *_past_end 用例的结果只有 pages/4 页，检查到达结果末尾后不再请求后续页。
+        """
+        from utils.async_crawler import AsyncWeiboCrawler
+        from utils.rate_control import AdaptiveRateController
+
+        max_rate = rate_limit * 4
+        cases = [
+            ('fixed_fast', 0.5 / rate_limit, False, pages),
+            ('fixed_slow', 2.0 / rate_limit, False, pages),
+            ('adaptive', 2.0 / rate_limit, True, pages),
+            ('adaptive_past_end', 2.0 / rate_limit, True, pages // 4),
+        ]
+        for mode, status in (('hard', 418), ('silent', 200)):
+            for name, delay, adaptive, result_pages in cases:
+                with StubWeiboServer(latency=0.01, rate_limit=rate_limit, burst=2, throttle_status=status,
+                                     max_pages=result_pages, seed=self.seed) as server:
+                    controller = None
+                    if adaptive:
+                        controller = AdaptiveRateController(delay, max_rate=max_rate)
+                    crawler = AsyncWeiboCrawler(delay=delay, concurrency=8, base_url=server.url, retries=5,
+                                                controller=controller)
+                    seconds, rows = measure(lambda: len(asyncio.run(crawler.crawl('python', pages))), 1)
+                    extra = {'rows': rows, 'complete': rows == result_pages * server.posts_per_page,
+                             'requests': server.stats['requests'], 'throttled': server.stats['throttled']}
+                    if controller is not None:
+                        extra['final_rate'] = round(controller.rate, 2)
+                        extra['within_bound'] = controller.rate <= max_rate
+                    self.record('throttle', f'{mode}_{name}', pages, seconds, unit='pages', **extra)
+
+    def run_parse(self, posts_per_page=20):
+        """解析搜索结果页并构建DataFrame，每个可用后端分别测量"""
+        from utils.parser import WeiboPageParser, ColumnBuffers, available_backends
+
+        for size in self.sizes:
+            posts = self.frame(size).to_dict('records')
+            batches = [posts[i:i + posts_per_page] for i in range(0, size, posts_per_page)]
+            html_pages = [render_search_page(batch) for batch in batches]
+            json_pages = [render_api_page(batch) for batch in batches]
+
+            def parse(parser, pages):
+                buffers = ColumnBuffers()
+                for page in pages:
+                    parser.parse(page, buffers)
+                return buffers.to_frame()
+
+            for backend in available_backends():
+                parser = WeiboPageParser(backend)
+                seconds, _ = measure(lambda: parse(parser, html_pages), self.repeat)
+                self.record('parse', f'html_{backend}', size, seconds)
+            seconds, _ = measure(lambda: parse(WeiboPageParser('python'), json_pages), self.repeat)
+            self.record('parse', 'json', size, seconds)
+
+    def run_stats(self):
+        """WeiboDataProcessor 各项统计"""
+        from utils.data_processor import WeiboDataProcessor
+
+        for size in self.sizes:
+            df = self.frame(size)
+            # 与界面使用相同的默认配置，数据量超过阈值时走分片并行路径
+            processor = WeiboDataProcessor()
+            cases = [
+                ('get_basic_stats', lambda: processor.get_basic_stats(df)),
+                ('get_author_stats', lambda: processor.get_author_stats(df)),
+                ('get_content_length_stats', lambda: processor.get_content_length_stats(df.copy())),
+                ('get_time_distribution', lambda: processor.get_time_distribution(df)),
+            ]
+            for case, func in cases:
+                seconds, _ = measure(func, self.repeat)
+                self.record('stats', case, size, seconds)
+
+            # 写入类操作只在新对象上执行一次，重复执行会命中缓存
+            seconds, _ = measure(lambda: WeiboDataProcessor().assign_duplicate_clusters(df.copy()), 1)
+            self.record('stats', 'assign_duplicate_clusters', size, seconds)
+            seconds, _ = measure(lambda: WeiboDataProcessor().ingest(df, 'python'), 1)
+            self.record('stats', 'ingest', size, seconds)
+
+            # 写入汇总后时间分布直接读取小时桶
+            processor.ingest(df, 'python')
+            seconds, _ = measure(lambda: processor.get_time_distribution(df), self.repeat)
+            self.record('stats', 'get_time_distribution_rollup', size, seconds)
+
+    def run_sharded(self, workers):
+        """分片并行聚合：workers 个进程与单进程 pandas 计算对比"""
+        from utils.data_processor import WeiboDataProcessor
+        from utils.parallel import ShardedAnalytics
+
+        # 不设最小分片行数，每个规模都切成 workers 个分片；进程池常驻复用，启动耗时单独记录
+        sharded = ShardedAnalytics(workers, min_shard_rows=1)
+        seconds, _ = measure(lambda: sharded.content_lengths(self.frame(min(self.sizes))), 1)
+        self.record('sharded', f'pool_start_w{workers}', workers, seconds, unit='workers')
+        for size in self.sizes:
+            df = self.frame(size)
+            single = WeiboDataProcessor(workers=1)
+            cases = [
+                ('author_stats', lambda: single.get_author_stats(df), lambda: sharded.author_stats(df)),
+                ('content_lengths', lambda: single.get_content_length_stats(df.copy()),
+                 lambda: sharded.content_lengths(df)),
+                ('hour_counts', lambda: single.get_time_distribution(df), lambda: sharded.hour_counts(df)),
+            ]
+            for case, serial, parallel in cases:
+                seconds, _ = measure(serial, self.repeat)
+                self.record('sharded', f'{case}_w1', size, seconds, workers=1)
+                seconds, _ = measure(parallel, self.repeat)
+                self.record('sharded', f'{case}_w{workers}', size, seconds, workers=workers,
+                            cpus=os.cpu_count())
+        sharded.close()
+
+    def run_filter(self):
+        """表格筛选"""
+        from utils.data_processor import WeiboDataProcessor
+
+        for size in self.sizes:
+            processor = WeiboDataProcessor()
+            # 在副本上写入'重复簇id'列，缓存的数据保持原样，不影响之后的场景
+            df = processor.assign_duplicate_clusters(self.frame(size).copy())
+            top_author = df['微博作者'].value_counts().index[0]
+            cases = [
+                ('by_author', lambda: processor.filter_posts(df, author=top_author)),
+                ('by_engagement', lambda: processor.filter_posts(df, min_engagement=100)),
+                ('collapse_duplicates', lambda: processor.filter_posts(df, collapse=True)),
+            ]
+            for case, func in cases:
+                seconds, _ = measure(func, self.repeat)
+                self.record('filter', case, size, seconds)
+
+    def run_render(self, max_rows):
+        """表格渲染（需要图形界面环境）"""
+        try:
+            import tkinter as tk
+            from app import WeiboSpiderGUI
+            root = tk.Tk()
+        except Exception as e:
+            print(f"  render    跳过: {str(e)}")
+            return
+
+        root.withdraw()
+        try:
+            app = WeiboSpiderGUI(root)
+            for size in self.sizes:
+                if size > max_rows:
+                    print(f"  render    跳过 {size:,} 行（超过 --render-max）")
+                    continue
+                app.df = self.frame(size)
+                seconds, _ = measure(lambda: (app.update_table(), root.update_idletasks()), 1)
+                self.record('render', 'update_table', size, seconds)
+        finally:
+            root.destroy()
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(RESULTS_DIR)).decode().strip()
+    except Exception:
+        return None
+
+
+def save_results(run, path=None):
+    """保存结果，默认文件名为运行时间"""
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = path or os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    data = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'results': run.results,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def latest_results(exclude=None):
+    if not os.path.isdir(RESULTS_DIR):
+        return None
+    files = sorted(name for name in os.listdir(RESULTS_DIR) if name.endswith('.json'))
+    files = [os.path.join(RESULTS_DIR, name) for name in files]
+    files = [path for path in files if path != exclude]
+    return files[-1] if files else None
+
+
+def compare(baseline_path, results, tolerance):
+    """与基线结果对比，返回回退的条目数"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {(r['scenario'], r['case'], r['size']): r for r in baseline['results']}
+
+    print(f"\n与基线对比: {baseline_path}（提交 {baseline.get('commit')}，容差 {tolerance:.0%}）")
+    regressions = 0
+    for result in results:
+        old = previous.get((result['scenario'], result['case'], result['size']))
+        if old is None or not old['seconds']:
+            continue
+        change = result['seconds'] / old['seconds'] - 1
+        mark = ''
+        if change > tolerance:
+            mark = '  ⚠️ 回退'
+            regressions += 1
+        elif change < -tolerance:
+            mark = '  ✅ 提升'
+        print(f"  {result['scenario']:<10}{result['case']:<28}{result['size']:>10,}"
+              f"{old['seconds']:>12.4f}s ->{result['seconds']:>10.4f}s{change:>+9.1%}{mark}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="微博爬虫离线基准测试")
+    parser.add_argument('--sizes', default='1000,10000,100000', help="数据规模，逗号分隔（默认 1000,10000,100000）")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help=f"运行的场景，可选 {','.join(SCENARIOS)}")
+    parser.add_argument('--repeat', type=int, default=3, help="每项重复次数，取最短耗时")
+    parser.add_argument('--seed', type=int, default=0, help="合成数据的随机种子")
+    parser.add_argument('--pages', type=int, default=20, help="crawl 场景抓取的页数")
+    parser.add_argument('--latency', type=float, default=0.02, help="桩服务器每个请求的延迟（秒）")
+    parser.add_argument('--render-max', type=int, default=100000, help="render 场景的最大行数")
+    parser.add_argument('--workers', type=int, default=max(2, os.cpu_count() or 1),
+                        help="sharded 场景的进程数（默认CPU核数，至少2）")
+    parser.add_argument('--output', help="结果文件路径（默认 benchmarks/results/<时间>.json）")
+    parser.add_argument('--compare', metavar='PATH', help="与指定结果文件对比，latest 表示上一次结果")
+    parser.add_argument('--tolerance', type=float, default=0.1, help="判定回退的耗时增幅（默认 0.1）")
+    parser.add_argument('--fail-on-regression', action='store_true', help="存在回退时以非零状态退出")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"未知场景: {', '.join(sorted(unknown))}")
+
+    run = BenchmarkRun(sizes, repeat=args.repeat, seed=args.seed)
+    print(f"  {'场景':<8}{'用例':<26}{'规模':>8}{'耗时':>12}{'吞吐量':>14}")
+    for scenario in scenarios:
+        if scenario == 'crawl':
+            run.run_crawl(args.pages, args.latency)
+        elif scenario == 'throttle':
+            run.run_throttle()
+        elif scenario == 'parse':
+            run.run_parse()
+        elif scenario == 'stats':
+            run.run_stats()
+        elif scenario == 'sharded':
+            run.run_sharded(args.workers)
+        elif scenario == 'filter':
+            run.run_filter()
+        elif scenario == 'render':
+            run.run_render(args.render_max)
+
+    path = save_results(run, args.output)
+    print(f"\n结果已保存: {path}")
+
+    regressions = 0
+    if args.compare:
+        baseline = latest_results(exclude=path) if args.compare == 'latest' else args.compare
+        if baseline:
+            regressions = compare(baseline, run.results, args.tolerance)
+        else:
+            print("没有可对比的历史结果")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
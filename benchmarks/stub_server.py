@@ -0,0 +1,165 @@
+"""本地微博搜索桩服务器
+
+在后台线程中提供与微博搜索一致的页面，可配置响应延迟和限流，
+用于离线测量爬取吞吐量和验证限流处理，不会访问真实站点。
+
+    /weibo?q=关键词&page=N                      s.weibo.com 结构的HTML
+    /api/container/getIndex?q=关键词&page=N     m.weibo.cn 结构的JSON
+"""
+import time
+import zlib
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from benchmarks.generator import WeiboGenerator, render_search_page, render_api_page
+
+
+class _TokenBucket:
+    """令牌桶限流器，rate为每秒请求数"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class _Server(ThreadingHTTPServer):
+    # 默认监听队列只有5，高并发连接时多余的握手会被丢弃并在1秒后重传
+    request_queue_size = 256
+    daemon_threads = True
+
+
+class StubWeiboServer:
+    """可配置延迟和限流的本地微博搜索服务器
+
+    latency/jitter: 每个请求的基础延迟和随机抖动（秒）
+    rate_limit/burst: 每秒允许的请求数和突发容量，超出时返回throttle_status（默认418，与微博一致），
+                      throttle_status=200 时返回空结果页，模拟静默限流
+    throttle_next: 静默限流的空结果页是否仍带"下一页"链接；为False时与真正的末页无法从页面本身区分
+    max_pages: 每个关键词的结果页数，超出后返回空结果页
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, rate_limit=None, burst=5, throttle_status=418,
+                 throttle_next=True, posts_per_page=20, max_pages=50, seed=0, host='127.0.0.1', port=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_status = throttle_status
+        self.throttle_next = throttle_next
+        self.posts_per_page = posts_per_page
+        self.max_pages = max_pages
+        self.seed = seed
+        self.bucket = _TokenBucket(rate_limit, burst) if rate_limit else None
+        self.stats = {'requests': 0, 'served': 0, 'throttled': 0, 'empty': 0}
+        self._stats_lock = threading.Lock()
+        self._pages = {}
+        self._pages_lock = threading.Lock()
+        self._rng = random.Random(seed)
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # 关闭 Nagle 算法，否则与客户端的延迟确认叠加，长连接上每个请求会多出约40ms
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = _Server((host, port), Handler)
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def posts_for(self, keyword, page):
+        """返回关键词某一页的微博（同一页多次请求内容一致）"""
+        if page > self.max_pages:
+            return []
+        key = (keyword, page)
+        with self._pages_lock:
+            posts = self._pages.get(key)
+            if posts is None:
+                seed = zlib.crc32(f"{self.seed}:{keyword}:{page}".encode('utf-8'))
+                posts = self._pages[key] = WeiboGenerator(seed=seed, authors=500).posts(self.posts_per_page)
+        return posts
+
+    def _handle(self, request):
+        self._count('requests')
+        delay = self.latency + (self._rng.random() * self.jitter if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+
+        throttled = self.bucket is not None and not self.bucket.acquire()
+        if throttled:
+            self._count('throttled')
+            if self.throttle_status != 200:
+                self._send(request, self.throttle_status, b'', 'text/plain')
+                return
+
+        parsed = urlparse(request.path)
+        query = parse_qs(parsed.query)
+        keyword = query.get('q', [''])[0]
+        try:
+            page = int(query.get('page', ['1'])[0])
+        except ValueError:
+            page = 1
+
+        posts = [] if throttled else self.posts_for(keyword, page)
+        self._count('served' if posts else 'empty')
+        if parsed.path.startswith('/api/'):
+            body = render_api_page(posts)
+            content_type = 'application/json; charset=utf-8'
+        elif parsed.path == '/weibo':
+            has_next = page < self.max_pages and (self.throttle_next or not throttled)
+            body = render_search_page(posts, page, has_next=has_next)
+            content_type = 'text/html; charset=utf-8'
+        else:
+            self._send(request, 404, b'', 'text/plain')
+            return
+        self._send(request, 200, body.encode('utf-8'), content_type)
+
+    def _send(self, request, status, body, content_type):
+        request.send_response(status)
+        request.send_header('Content-Type', content_type)
+        request.send_header('Content-Length', str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
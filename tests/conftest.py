@@ -0,0 +1,5 @@
+import os
+import sys
+
+# utils、benchmarks 不是安装的包，从仓库根目录导入
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,102 @@
+import asyncio
+from urllib.request import urlopen
+
+import pytest
+
+from benchmarks.stub_server import StubWeiboServer
+from utils.async_crawler import AsyncWeiboCrawler
+from utils.rate_control import AdaptiveRateController
+
+PAGES = 12
+RATE_LIMIT = 10.0
+
+
+def crawl_throttled(throttle_status, delay, adaptive, max_rate=RATE_LIMIT * 4, throttle_next=True):
+    """对每秒只允许RATE_LIMIT个请求的桩服务器爬取PAGES页，返回 (行数, 服务器统计, 控制器, 速率记录)"""
+    rates = []
+    with StubWeiboServer(latency=0.01, rate_limit=RATE_LIMIT, burst=2, throttle_status=throttle_status,
+                         throttle_next=throttle_next, max_pages=PAGES) as server:
+        controller = None
+        if adaptive:
+            controller = AdaptiveRateController(delay, max_rate=max_rate)
+            record = controller.record
+
+            def tracked(*args, **kwargs):
+                interval = record(*args, **kwargs)
+                rates.append(controller.rate)
+                return interval
+
+            controller.record = tracked
+        crawler = AsyncWeiboCrawler(delay=delay, base_url=server.url, retries=5, controller=controller)
+        rows = len(asyncio.run(crawler.crawl('python', PAGES)))
+        return rows, dict(server.stats), controller, rates, server.posts_per_page
+
+
+@pytest.mark.parametrize('throttle_status, throttle_next', [(418, True), (200, True), (200, False)],
+                         ids=['hard', 'silent', 'silent-no-next'])
+def test_adaptive_crawl_collects_every_page_within_bounds(throttle_status, throttle_next):
+    max_rate = RATE_LIMIT * 4
+    rows, stats, controller, rates, per_page = crawl_throttled(throttle_status, 2.0 / RATE_LIMIT, True, max_rate,
+                                                               throttle_next)
+    assert rows == PAGES * per_page
+    assert rates and max(rates) <= max_rate
+    assert controller.rate >= controller.min_rate
+
+    _, fast_stats, _, _, _ = crawl_throttled(throttle_status, 0.5 / RATE_LIMIT, False, throttle_next=throttle_next)
+    assert fast_stats['throttled'] > 0
+    assert stats['throttled'] < fast_stats['throttled']
+
+
+@pytest.mark.parametrize('adaptive', [False, True], ids=['fixed', 'adaptive'])
+def test_stops_requesting_after_the_last_result_page(adaptive):
+    with StubWeiboServer(latency=0.01, max_pages=3) as server:
+        controller = AdaptiveRateController(0.2, max_rate=2.0) if adaptive else None
+        crawler = AsyncWeiboCrawler(delay=0.2, base_url=server.url, controller=controller)
+        rows = len(asyncio.run(crawler.crawl('python', 20)))
+        assert rows == 3 * server.posts_per_page
+        # 第4页为空且没有"下一页"链接，之后的页不再请求
+        assert server.stats['requests'] <= 5
+        if controller is not None:
+            assert controller.stats['empty'] == 0
+            assert controller.stats['decreases'] == 0
+
+
+def test_throttled_first_page_without_next_link_is_retried():
+    # 静默限流的第1页为空且没有"下一页"链接，与"没有结果"无法区分，应重试而不是当作末尾
+    with StubWeiboServer(latency=0.01, rate_limit=2, burst=1, throttle_status=200, throttle_next=False,
+                         max_pages=2) as server:
+        urlopen(f"{server.url}/weibo?q=warmup&page=1").read()
+        controller = AdaptiveRateController(0.1, max_rate=20)
+        crawler = AsyncWeiboCrawler(delay=0.1, base_url=server.url, retries=5, controller=controller)
+        rows = len(asyncio.run(crawler.crawl('python', 2)))
+    assert server.stats['throttled'] > 0
+    assert rows == 2 * server.posts_per_page
+
+
+def test_keyword_without_results_ends_after_retries(capsys):
+    with StubWeiboServer(latency=0.01, max_pages=0) as server:
+        controller = AdaptiveRateController(0.05, max_rate=40)
+        crawler = AsyncWeiboCrawler(delay=0.05, base_url=server.url, retries=2, controller=controller)
+        rows = len(asyncio.run(crawler.crawl('python', 3)))
+    assert rows == 0
+    # 第1页重试后仍为空才视为没有结果，不当作请求失败
+    assert 3 <= server.stats['requests'] <= 5
+    assert '出错' not in capsys.readouterr().out
+
+
+def test_unparseable_page_is_dropped_without_failing_the_crawl():
+    with StubWeiboServer(latency=0.01, max_pages=4) as server:
+        crawler = AsyncWeiboCrawler(delay=0.01, base_url=server.url)
+        parse = crawler.parser.parse
+        calls = []
+
+        def flaky(text, buffers):
+            calls.append(text)
+            if len(calls) == 2:
+                raise ValueError('bad page')
+            return parse(text, buffers)
+
+        crawler.parser.parse = flaky
+        rows = len(asyncio.run(crawler.crawl('python', 4)))
+    assert len(calls) == 4
+    assert rows == 3 * server.posts_per_page
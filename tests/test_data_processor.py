@@ -0,0 +1,47 @@
+import pandas as pd
+
+from utils.data_processor import WeiboDataProcessor
+
+TIMES = ['2024-05-01 12:30', '2024/05/02 14:00', '今天 08:10', '05月01日 09:00', '2024年05月03日 23:59', 'N/A']
+
+
+def frame(times, ids=None):
+    ids = ids or [str(i) for i in range(len(times))]
+    return pd.DataFrame({
+        '微博id': ids,
+        '微博作者': [f'作者{i % 3}' for i in range(len(times))],
+        '微博内容': [f'内容{i}' for i in range(len(times))],
+        '发布时间': times,
+        '转发数': 1,
+        '评论数': 2,
+        '点赞数': 3,
+        'url': None,
+    })
+
+
+def test_time_distribution_is_the_same_with_and_without_rollups():
+    df = frame(TIMES * 3)
+    from_frame = WeiboDataProcessor(workers=1).get_time_distribution(df)
+
+    processor = WeiboDataProcessor(workers=1)
+    processor.ingest(df)
+    from_rollup = processor.get_time_distribution(df)
+
+    assert from_frame.to_dict() == {8: 3, 9: 3, 12: 3, 14: 3, 23: 3}
+    pd.testing.assert_series_equal(from_frame, from_rollup)
+
+
+def test_post_matching_two_keywords_counts_for_both():
+    processor = WeiboDataProcessor(workers=1)
+    df = frame(['2024-05-01 12:30'])
+    assert processor.ingest(df, 'A') == 1
+    assert processor.ingest(df, 'B') == 0
+    assert processor.ingest(df, 'B') == 0
+
+    start, end = 0, 2 ** 40
+    assert processor.rollup.totals(start, end, keyword='A')[0] == 1
+    assert processor.rollup.totals(start, end, keyword='B')[0] == 1
+    # 总数和作者维度只计一次
+    assert processor.rollup.totals(start, end)[0] == 1
+    assert processor.rollup.totals(start, end, author='作者0')[0] == 1
+    assert processor.get_top_authors('微博数').loc['作者0', '微博数'] == 1
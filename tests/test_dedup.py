@@ -0,0 +1,53 @@
+import random
+
+from utils.dedup import NearDuplicateDetector
+
+BASE = '今天天气真好，和朋友一起去公园散步，看到了很多盛开的樱花，心情特别愉快'
+
+
+def test_near_duplicates_share_a_cluster_and_distinct_posts_do_not():
+    detector = NearDuplicateDetector()
+    detector.add('a', BASE)
+    # 只多了话题、@提及、表情和链接的转发
+    detector.add('b', BASE + ' #春天# @小明 [哈哈] http://t.cn/abc')
+    detector.add('c', BASE.replace('愉快', '开心'))
+    detector.add('d', '新款手机发布会将于下周举行，据说会有全新的处理器和更大的电池')
+    assert detector.cluster_of('b') == 'a'
+    assert detector.cluster_of('c') == 'a'
+    assert detector.cluster_of('d') == 'd'
+
+
+def test_posts_without_comparable_text_get_their_own_cluster():
+    detector = NearDuplicateDetector()
+    for key, text in [('x', 'N/A'), ('y', 'N/A'), ('z', ''), ('e1', '[哈哈][哈哈]'), ('e2', '[哈哈]'),
+                      ('u', 'http://t.cn/abc')]:
+        assert detector.add(key, text) == key
+    assert len({detector.cluster_of(key) for key in ('x', 'y', 'z', 'e1', 'e2', 'u')}) == 6
+
+
+def test_cluster_ids_are_stable_as_posts_are_added():
+    detector = NearDuplicateDetector()
+    assert detector.add('first', BASE) == 'first'
+    rng = random.Random(0)
+    for i in range(200):
+        # 大量无关微博和重复微博交替加入
+        detector.add(f'other{i}', ''.join(rng.choice('春夏秋冬山水风云花鸟鱼虫日月星辰') for _ in range(30)))
+        assert detector.add(f'dup{i}', BASE + f' #话题{i}#') == 'first'
+    assert detector.cluster_of('first') == 'first'
+    assert detector.add('first', '已加入的微博不会重新计算') == 'first'
+
+
+def test_batched_similarity_matches_pairwise_similarity():
+    detector = NearDuplicateDetector()
+    rng = random.Random(1)
+    # 在同一段文本上随机替换若干字，相似度分布在阈值两侧
+    texts = [''.join(rng.choice('甲乙丙丁') if rng.random() < rng.random() * 0.15 else char for char in BASE)
+             for _ in range(300)]
+    for i, text in enumerate(texts):
+        detector._store_signature(str(i), detector.signature(detector.normalize(text)))
+    target = len(texts) - 1
+    candidates = list(range(target))
+    expected = {row for row in candidates
+                if detector.similarity(detector._matrix[target], detector._matrix[row]) >= detector.threshold}
+    assert 0 < len(expected) < len(candidates)
+    assert detector._similar_rows(target, candidates) == expected
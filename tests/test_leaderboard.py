@@ -0,0 +1,138 @@
+import heapq
+import random
+from collections import Counter
+
+import pandas as pd
+import pytest
+
+from utils.data_processor import WeiboDataProcessor
+from utils.leaderboard import Leaderboard, SpaceSaving, TopKHeap
+
+
+def _zipf_stream(count, keys, seed=0):
+    rng = random.Random(seed)
+    return [f"作者{min(int(rng.paretovariate(1.0)) - 1, keys - 1)}" for _ in range(count)]
+
+
+def _top_values(counts, k):
+    return sorted(heapq.nlargest(k, counts.values()), reverse=True)
+
+
+def test_space_saving_exact_under_capacity():
+    stream = _zipf_stream(5000, 50)
+    counter = SpaceSaving(capacity=50, track=5)
+    for key in stream:
+        counter.add(key)
+    expected = Counter(stream)
+    assert counter.exact
+    assert all(counter.count(key) == value and counter.error(key) == 0 for key, value in expected.items())
+    top = counter.top(5)
+    assert [value for _, value, _ in top] == _top_values(expected, 5)
+    assert all(expected[key] == value and error == 0 for key, value, error in top)
+
+
+def test_space_saving_error_bound_after_eviction():
+    stream = _zipf_stream(20000, 2000, seed=1)
+    counter = SpaceSaving(capacity=100, track=10)
+    for key in stream:
+        counter.add(key)
+    expected = Counter(stream)
+    assert not counter.exact
+    assert len(counter) == 100
+    # 计数总和等于写入总量，每个key的真实计数落在 [计数-高估量, 计数] 之间
+    assert sum(counter._counts.values()) == len(stream)
+    for key in counter._counts:
+        assert counter.count(key) - counter.error(key) <= expected[key] <= counter.count(key)
+    # 真实计数超过 总量/capacity 的key一定被保留
+    for key, value in expected.items():
+        if value > len(stream) / 100:
+            assert key in counter._counts
+
+
+def test_space_saving_weighted_eviction_bound():
+    rng = random.Random(2)
+    counter = SpaceSaving(capacity=20, track=5)
+    expected = Counter()
+    for _ in range(5000):
+        key, weight = rng.randrange(200), rng.randrange(0, 50)
+        counter.add(key, weight)
+        expected[key] += weight
+    for key, value, error in counter.top(5):
+        assert value - error <= expected[key] <= value
+
+
+@pytest.mark.parametrize('capacity', [None, 30])
+def test_space_saving_tracked_top_matches_counts(capacity):
+    # 每次写入后，维护的榜单都应该等于全部计数中最高的track个；计数只增不减，_floor不会高于榜单最小值
+    rng = random.Random(3)
+    counter = SpaceSaving(capacity=capacity, track=4)
+    for _ in range(3000):
+        counter.add(rng.randrange(80), rng.randrange(1, 5))
+        assert sorted(counter._top.values(), reverse=True) == _top_values(counter._counts, 4)
+        assert counter._floor <= min(counter._top.values())
+
+
+def test_space_saving_update_top_floor():
+    counter = SpaceSaving(capacity=None, track=2)
+    counter.add('a', 5)
+    counter.add('b', 3)
+    assert counter._top == {'a': 5, 'b': 3}
+    # 不超过榜单最小值的key不会进入榜单
+    counter.add('c', 3)
+    assert 'c' not in counter._top
+    counter.add('c', 1)
+    assert counter._top == {'a': 5, 'c': 4}
+    assert counter._floor == 4
+    counter.add('b', 2)
+    assert counter._top == {'a': 5, 'b': 5}
+    assert counter._floor == 5
+
+
+def test_space_saving_top_beyond_track_rebuilds():
+    counter = SpaceSaving(capacity=None, track=3)
+    for index in range(10):
+        counter.add(f"k{index}", index + 1)
+    assert len(counter.top(3)) == 3
+    top = counter.top(8)
+    assert counter.track == 8
+    assert [key for key, _, _ in top] == [f"k{index}" for index in range(9, 1, -1)]
+    # 扩大后的榜单继续随写入更新
+    counter.add('k0', 100)
+    assert counter.top(8)[0] == ('k0', 101, 0)
+
+
+def test_top_k_heap_keeps_highest_and_first_on_ties():
+    rng = random.Random(4)
+    heap = TopKHeap(5)
+    scores = [rng.randrange(100) for _ in range(500)]
+    for index, score in enumerate(scores):
+        heap.push(score, index)
+    items = heap.items()
+    assert [score for score, _ in items] == sorted(scores, reverse=True)[:5]
+    for score, index in items:
+        assert scores[index] == score
+    # 得分相同时保留先写入的条目
+    ties = TopKHeap(2)
+    for item in 'abc':
+        ties.push(1, item)
+    assert ties.items() == [(1, 'a'), (1, 'b')]
+    assert not ties.push(1, 'd')
+    assert ties.push(2, 'e')
+    assert ties.items() == [(2, 'e'), (1, 'a')]
+
+
+def test_unknown_metric_raises():
+    board = Leaderboard()
+    with pytest.raises(ValueError):
+        board.top_authors('点赞数')
+    with pytest.raises(ValueError):
+        board.top_posts('微博数')
+
+    processor = WeiboDataProcessor()
+    df = pd.DataFrame({'微博id': ['1'], '微博作者': ['a'], '微博内容': ['x'], '发布时间': ['刚刚'],
+                       '转发数': [1], '评论数': [2], '点赞数': [3], 'url': ['u']})
+    for frame in (None, df):
+        with pytest.raises(ValueError):
+            processor.get_top_authors('点赞数', df=frame)
+        with pytest.raises(ValueError):
+            processor.get_top_posts('微博数', df=frame)
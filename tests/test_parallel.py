@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+from benchmarks.generator import WeiboGenerator
+from utils.data_processor import WeiboDataProcessor
+from utils.parallel import ShardedAnalytics
+
+
+@pytest.fixture(scope='module')
+def sharded():
+    analytics = ShardedAnalytics(workers=2, min_shard_rows=1)
+    if not analytics.available:
+        pytest.skip("共享内存不可用")
+    yield analytics
+    analytics.close()
+
+
+@pytest.fixture(scope='module')
+def df():
+    df = WeiboGenerator(seed=0).frame(2000)
+    # 两个分片各自的时间格式不同，分片解析结果必须与单进程一致
+    df['发布时间'] = ['2024-05-01 12:30'] * 1000 + ['2024/05/02 14:00'] * 1000
+    df.loc[::7, '发布时间'] = '今天 08:10'
+    return df
+
+
+def test_author_stats_match_single_process(sharded, df):
+    single = WeiboDataProcessor(workers=1).get_author_stats(df)
+    processor = WeiboDataProcessor(workers=2, parallel_threshold=1)
+    processor.sharded = sharded
+    pd.testing.assert_frame_equal(processor.get_author_stats(df), single, check_dtype=False)
+
+
+def test_content_lengths_match_single_process(sharded, df):
+    expected = df['微博内容'].astype(str).apply(len)
+    pd.testing.assert_series_equal(sharded.content_lengths(df), expected, check_dtype=False, check_names=False)
+
+
+def test_hour_counts_match_single_process(sharded, df):
+    single = WeiboDataProcessor(workers=1).get_time_distribution(df)
+    processor = WeiboDataProcessor(workers=2, parallel_threshold=1)
+    processor.sharded = sharded
+    assert set(single.index) == {8, 12, 14}
+    pd.testing.assert_series_equal(processor.get_time_distribution(df), single)
+
+
+def test_text_with_separator_falls_back_to_pickling(sharded):
+    df = pd.DataFrame({'微博内容': ['a\x00b', '中文', 'xyz', '']})
+    assert sharded.content_lengths(df).tolist() == [3, 2, 3, 0]
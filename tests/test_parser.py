@@ -0,0 +1,70 @@
+import pytest
+
+from benchmarks.generator import WeiboGenerator, render_search_page, render_api_page, COLUMNS
+from utils.parser import WeiboPageParser, ColumnBuffers, available_backends, parse_count
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('123', 123),
+    ('1,234', 1234),
+    ('1，234', 1234),
+    ('12,345,678', 12345678),
+    ('1.2万', 12000),
+    ('3亿', 300000000),
+    ('100+', 100),
+    (' 转发 56 ', 56),
+    ('转发', 0),
+    ('赞', 0),
+    ('', 0),
+    (None, 0),
+    (42, 42),
+])
+def test_parse_count(text, expected):
+    assert parse_count(text) == expected
+
+
+def _generated(count=300, seed=3):
+    posts = WeiboGenerator(seed=seed, authors=200).posts(count)
+    # 保证页面中出现 "1.2万" 这类按万显示的互动数
+    for i, post in enumerate(posts[::10]):
+        post['点赞数'] = 10000 + i * 1000
+        post['转发数'] = 250000
+    return posts
+
+
+def _parse(parser, page):
+    buffers = ColumnBuffers(capacity=16)
+    rows = parser.parse(page, buffers)
+    return rows, buffers.to_frame()
+
+
+@pytest.mark.parametrize('backend', available_backends())
+def test_html_backends_match_generator(backend):
+    posts = _generated()
+    rows, frame = _parse(WeiboPageParser(backend), render_search_page(posts))
+    assert rows == len(posts)
+    assert frame.to_dict('records') == [{name: post[name] for name in COLUMNS} for post in posts]
+
+
+def test_json_parser_matches_generator():
+    posts = _generated()
+    rows, frame = _parse(WeiboPageParser(), render_api_page(posts))
+    assert rows == len(posts)
+    assert frame.to_dict('records') == [{name: post[name] for name in COLUMNS} for post in posts]
+
+
+def test_parsers_agree_with_each_other():
+    posts = _generated(seed=11)
+    frames = [_parse(WeiboPageParser(backend), render_search_page(posts))[1] for backend in available_backends()]
+    frames.append(_parse(WeiboPageParser(), render_api_page(posts))[1])
+    for frame in frames[1:]:
+        assert frame.equals(frames[0])
+
+
+def test_empty_page_and_next_link():
+    parser = WeiboPageParser()
+    rows, frame = _parse(parser, render_search_page([], page=3, has_next=False))
+    assert rows == 0 and frame.empty
+    assert parser.has_next_page(render_search_page([], page=3, has_next=False)) is False
+    assert parser.has_next_page(render_search_page(_generated(5), page=1)) is True
+    assert parser.has_next_page(render_api_page(_generated(5))) is None
@@ -0,0 +1,57 @@
+import time
+
+import pytest
+
+from utils.rate_control import AdaptiveRateController
+
+
+@pytest.mark.parametrize('status', [418, 429])
+def test_throttle_halves_rate(status):
+    controller = AdaptiveRateController(1.0, max_rate=4)
+    controller.record(status, sent_at=time.monotonic())
+    assert controller.rate == pytest.approx(0.5)
+    assert controller.stats['throttled'] == 1
+
+
+def test_success_increases_rate_additively():
+    controller = AdaptiveRateController(1.0, max_rate=4, increase=0.1)
+    controller.record(200, latency=0.01, rows=20)
+    assert controller.rate == pytest.approx(1.1)
+
+
+def test_rate_is_clamped():
+    controller = AdaptiveRateController(0.01, max_rate=2.0, min_rate=0.5)
+    assert controller.rate == 2.0
+    for _ in range(50):
+        controller.record(200, latency=0.01, rows=20)
+    assert controller.rate == 2.0
+
+    for _ in range(20):
+        controller.record(418)
+    assert controller.rate == 0.5
+    assert controller.interval == 2.0
+
+
+def test_requests_sent_before_a_decrease_do_not_decrease_again():
+    controller = AdaptiveRateController(1.0, max_rate=4)
+    sent_at = time.monotonic()
+    controller.record(418, sent_at=sent_at)
+    # 同一批并发请求陆续返回的限流不再重复减半
+    controller.record(418, sent_at=sent_at)
+    controller.record(429, sent_at=sent_at)
+    assert controller.rate == pytest.approx(0.5)
+    assert controller.stats == dict(controller.stats, throttled=3, decreases=1)
+
+    controller.record(418, sent_at=time.monotonic())
+    assert controller.rate == pytest.approx(0.25)
+
+
+def test_empty_page_is_soft_decrease_unless_past_the_end():
+    controller = AdaptiveRateController(1.0, max_rate=4, increase=0.1)
+    controller.record(200, latency=0.01, rows=0)
+    assert controller.rate == pytest.approx(0.8)
+    assert controller.stats['empty'] == 1
+
+    # 超出结果末尾的空页传入 rows=None，按正常响应处理
+    controller.record(200, latency=0.01, rows=None)
+    assert controller.rate > 0.8
@@ -0,0 +1,313 @@
+import time
+import asyncio
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.metrics import metrics
+from utils.parser import WeiboPageParser, ColumnBuffers
+from utils.rate_control import THROTTLE_STATUS
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp 为可选依赖，未安装时在线程池中用requests发送请求
+    aiohttp = None
+
+DEFAULT_HEADERS = {
+    'User-Agent': ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                   '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'),
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'zh-CN,zh;q=0.9',
+}
+
+# 需要等待后重试的状态码：418/429 为限流，5xx 为服务端临时错误
+RETRY_STATUS = frozenset((418, 429, 500, 502, 503, 504))
+
+# 视为请求失败并重试的异常（requests 的异常是 OSError 的子类）
+REQUEST_ERRORS = (asyncio.TimeoutError, OSError) + ((aiohttp.ClientError,) if aiohttp is not None else ())
+
+
+class AsyncRateLimiter:
+    """所有爬取任务共享的异步限速器，相邻两次请求的开始时间至少间隔interval秒
+
+    每次调用只在事件循环线程中预约下一个时间槽，不需要加锁。
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._next = 0.0
+
+    async def acquire(self, cancel=None):
+        """等待预约的时间槽，返回True；cancel（asyncio.Event）先被设置时提前返回False"""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        start = max(now, self._next)
+        self._next = start + self.interval
+        if start <= now:
+            return True
+        if cancel is None:
+            await asyncio.sleep(start - now)
+            return True
+        try:
+            await asyncio.wait_for(cancel.wait(), start - now)
+        except asyncio.TimeoutError:
+            return True
+        return False
+
+
+class _ResultPages:
+    """记录一个关键词已确认存在的结果页，用于区分结果末尾的空页和静默限流返回的空页"""
+
+    def __init__(self, max_pages):
+        # 需要爬取的最后一页，确认到达结果末尾后减小
+        self.last = max_pages
+        # 已确认存在的最大页码：有数据的页，或带"下一页"链接的页的下一页
+        self.known = 0
+        # 确认到达结果末尾时设置，唤醒正在等待限速器的后续页
+        self.ended = asyncio.Event()
+        self._done = {page: asyncio.Event() for page in range(1, max_pages + 1)}
+
+    def found(self, page, has_next):
+        self.known = max(self.known, page + 1 if has_next else page)
+
+    def resolve(self, page):
+        self._done[page].set()
+
+    async def is_end(self, page, has_next, final=True):
+        """空结果页是否为结果末尾；页面带"下一页"链接或与已确认存在的页矛盾时视为限流
+
+        静默限流的空页可能同样没有"下一页"链接，只有前一页确认存在时才能据此判断为末尾。
+        第1页或前一页最终失败时无法区分"没有更多结果"和限流，先视为限流重试，
+        final（最后一次重试）仍为空页时才视为末尾。
+        """
+        if has_next:
+            return False
+        if page - 1 in self._done:
+            # 等前一页完成后再判断，避免并发请求时因前面的页还没返回而把限流误判为末尾
+            await self._done[page - 1].wait()
+        if page <= self.known:
+            return False
+        if page > self.last:  # 之前的页已确认到达末尾
+            return True
+        if (page == 1 or page - 1 > self.known) and not final:
+            return False
+        self.last = page - 1
+        self.ended.set()
+        return True
+
+
+class AsyncWeiboCrawler:
+    """基于asyncio的微博搜索爬虫，输出与 get_weibo_list 一致的DataFrame
+
+    concurrency 限制同时进行的请求数，limiter 控制请求的发起间隔，
+    同一个爬虫爬取多个关键词时共享并发数和限速器。
+    传入 controller（AdaptiveRateController）时，每次请求的结果都会反馈给它，并据此调整限速器的间隔。
+    """
+
+    def __init__(self, delay=2.0, concurrency=8, base_url='https://s.weibo.com', search_path='/weibo',
+                 headers=None, timeout=10, retries=2, limiter=None, backend='auto', controller=None):
+        self.controller = controller
+        if limiter is None:
+            limiter = AsyncRateLimiter(controller.interval if controller is not None else delay)
+        self.limiter = limiter
+        self.concurrency = concurrency
+        self.base_url = base_url.rstrip('/')
+        self.search_path = search_path
+        self.headers = dict(DEFAULT_HEADERS, **(headers or {}))
+        self.timeout = timeout
+        self.retries = retries
+        self.parser = WeiboPageParser(backend)
+
+    async def crawl(self, keyword, max_pages, on_progress=None):
+        """爬取一个关键词的前max_pages页，返回DataFrame"""
+        frames = await self.crawl_many([keyword], max_pages, on_progress)
+        return frames[keyword]
+
+    async def crawl_many(self, keywords, max_pages, on_progress=None):
+        """并发爬取多个关键词，返回 {关键词: DataFrame}
+
+        on_progress(已完成页数, 总页数) 在事件循环线程中调用。
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        total = len(keywords) * max_pages
+        done = 0
+        results = {keyword: _ResultPages(max_pages) for keyword in keywords}
+
+        async def fetch(session, keyword, page):
+            nonlocal done
+            try:
+                async with semaphore:
+                    buffers = await self.fetch_page(session, keyword, page, results[keyword])
+            finally:
+                results[keyword].resolve(page)
+            done += 1
+            if on_progress is not None:
+                on_progress(done, total)
+            return buffers
+
+        async with self._open_session() as session:
+            tasks = [fetch(session, keyword, page) for keyword in keywords for page in range(1, max_pages + 1)]
+            pages = await asyncio.gather(*tasks)
+
+        # 按关键词和页码顺序合并，保证输出顺序与逐页爬取一致
+        frames = {}
+        for index, keyword in enumerate(keywords):
+            buffers = ColumnBuffers()
+            for page_buffers in pages[index * max_pages:(index + 1) * max_pages]:
+                if page_buffers is not None:
+                    buffers.extend(page_buffers)
+            frames[keyword] = buffers.to_frame()
+        return frames
+
+    async def fetch_page(self, session, keyword, page, results=None):
+        """请求并解析一页搜索结果，返回该页的ColumnBuffers，超出结果末尾或最终失败返回None
+
+        results 为该关键词的 _ResultPages，确认到达结果末尾后不再请求之后的页。
+        """
+        if results is None:
+            results = _ResultPages(0)
+        url = self.base_url + self.search_path
+        params = {'q': keyword, 'page': page}
+        for attempt in range(self.retries + 1):
+            if page > results.last:
+                return None
+            # 以预约请求时间为准：控制器降速前已排队的请求不会再次触发降速
+            sent_at = time.monotonic()
+            if not await self.limiter.acquire(None if results.ended.is_set() else results.ended):
+                if page > results.last:  # 排队期间已确认到达结果末尾
+                    return None
+                await self.limiter.acquire()
+            started = time.monotonic()
+            try:
+                status, text = await self._get(session, url, params)
+            except REQUEST_ERRORS as e:
+                status, text = None, str(e) or type(e).__name__
+            latency = time.monotonic() - started
+
+            rows = None
+            if status == 200:
+                buffers = ColumnBuffers(32)
+                try:
+                    rows = self.parser.parse(text, buffers)
+                except Exception as e:
+                    # 页面格式异常时重试也无济于事，只放弃这一页
+                    print(f"解析关键词 '{keyword}' 第{page}页出错: {str(e)}")
+                    return None
+                if rows:
+                    results.found(page, self.parser.has_next_page(text))
+                elif await results.is_end(page, self.parser.has_next_page(text), attempt == self.retries):
+                    # 超出结果末尾的空页是正常响应，不降速也不重试
+                    rows = None
+            if self.controller is not None:
+                self.limiter.interval = self.controller.record(status, latency, rows, sent_at)
+
+            if status == 200:
+                metrics.count('pages_fetched')
+                if rows != 0:
+                    return buffers
+                # 空结果页与已确认存在的页矛盾，视为静默限流，等待后重试
+                metrics.count('requests_throttled')
+            elif status is not None and status not in RETRY_STATUS:
+                break
+            elif status in THROTTLE_STATUS:
+                metrics.count('requests_throttled')
+            # 自适应模式下由控制器调整间隔，否则按指数退避等待
+            if self.controller is None and attempt < self.retries:
+                await asyncio.sleep(max(self.limiter.interval, 1.0) * 2 ** attempt)
+
+        print(f"爬取关键词 '{keyword}' 第{page}页出错: {status or text}")
+        return None
+
+    def _open_session(self):
+        if aiohttp is not None:
+            return aiohttp.ClientSession(headers=self.headers, timeout=aiohttp.ClientTimeout(total=self.timeout),
+                                         connector=aiohttp.TCPConnector(limit=self.concurrency))
+        print("未安装aiohttp，异步爬取改为在线程池中用requests发送请求（pip install aiohttp）")
+        return _RequestsSession(self.headers, self.timeout, self.concurrency)
+
+    async def _get(self, session, url, params):
+        if aiohttp is not None:
+            async with session.get(url, params=params) as response:
+                return response.status, await response.text()
+        return await session.get(url, params)
+
+
+class _RequestsSession:
+    """未安装aiohttp时的替代实现：在与并发数同样大小的线程池中执行requests请求"""
+
+    def __init__(self, headers, timeout, concurrency=8):
+        import requests
+        self._session = requests.Session()
+        self._session.headers.update(headers)
+        # 连接池大小与并发数一致，避免超过默认的10个连接后反复建立连接
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=concurrency)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        self._timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='crawl-request')
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self._executor.shutdown(wait=False)
+        self._session.close()
+        return False
+
+    async def get(self, url, params):
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(self._executor, partial(self._session.get, url, params=params,
+                                                                          timeout=self._timeout))
+        return response.status_code, response.text
+
+
+def crawl_weibo_list(keyword, max_pages, delay, **kwargs):
+    """同步入口，参数和返回值与 base.get_weibo_list 一致"""
+    return asyncio.run(AsyncWeiboCrawler(delay=delay, **kwargs).crawl(keyword, max_pages))
+
+
+class CrawlLoopThread:
+    """在单个后台线程中运行asyncio事件循环，供Tk界面提交爬取任务
+
+    submit() 可在任意线程调用；传入root时，完成回调通过 root.after 回到Tk主线程执行。
+    """
+
+    def __init__(self, root=None):
+        self.root = root
+        self.loop = asyncio.new_event_loop()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name='crawl-loop', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    def submit(self, coro, callback=None):
+        """提交协程，返回 concurrent.futures.Future，调用其 cancel() 可取消爬取"""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        if callback is not None:
+            if self.root is not None:
+                # 停止后界面可能已经销毁，不再回调
+                future.add_done_callback(lambda done: self._stopping or self.root.after(0, callback, done))
+            else:
+                future.add_done_callback(callback)
+        return future
+
+    def stop(self, timeout=5):
+        """取消未完成的爬取任务，停止事件循环并等待线程退出"""
+        self._stopping = True
+        if self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop)
+        self._thread.join(timeout)
+
+    async def _shutdown(self):
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        # 等待任务处理取消，关闭其中打开的连接
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.loop.stop()
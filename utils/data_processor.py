@@ -1,18 +1,158 @@
 import pandas as pd
 import re
 from datetime import datetime
+from itertools import repeat
+
+from utils.dedup import NearDuplicateDetector
+from utils.leaderboard import Leaderboard, check_metric
+from utils.metrics import metrics
+from utils.parallel import ShardedAnalytics
+from utils.rollup import TimeRollup, METRICS, parse_publish_time, parse_publish_times, to_timestamp, from_timestamp
 
 class WeiboDataProcessor:
     """微博数据处理器"""
     
-    def __init__(self):
-        pass
+    def __init__(self, workers=None, parallel_threshold=None):
+        # 近似重复检测器，签名按微博id缓存，多次调用不会重复计算
+        self.dedup = NearDuplicateDetector()
+        
+        # 增量汇总结构，随新爬取的数据更新
+        self.rollup = TimeRollup()
+        self.leaderboard = Leaderboard(k=10)
+        self._ingested_ids = set()
+        self._ingested_keywords = set()
+        
+        # 分片并行统计：设置 parallel_threshold 后，数据量达到阈值且有多个CPU核心时启用。
+        # 默认关闭：实测单进程 groupby 等统计已足够快，进程间传递数据的开销抵消了并行收益
+        self.sharded = ShardedAnalytics(workers)
+        self.parallel_threshold = parallel_threshold
+    
+    def _use_parallel(self, df):
+        """判断是否使用多进程分片计算"""
+        return (self.parallel_threshold is not None and self.sharded.available
+                and len(df) >= self.parallel_threshold)
+    
+    def reset(self):
+        """清空增量汇总数据（近似重复签名缓存保留）"""
+        self.rollup.clear()
+        self.leaderboard.clear()
+        self._ingested_ids = set()
+        self._ingested_keywords = set()
+    
+    def ingest(self, df, keyword=None):
+        """把新爬取的数据增量写入汇总结构，返回新写入的微博数
+        
+        已经写入过的微博（按微博id判断）会被跳过，因此可以逐页重复调用；
+        同一条微博出现在另一个关键词的结果中时，只计入该关键词维度，不重复计入总数和作者维度。
+        """
+        if df.empty:
+            return 0
+        
+        try:
+            with metrics.timer('ingest'):
+                ids = df['微博id'].astype(str) if '微博id' in df.columns else df.index.astype(str)
+                if keyword is None and '关键词' in df.columns:
+                    keywords = df['关键词']
+                else:
+                    keywords = repeat(keyword)
+                urls = df['url'] if 'url' in df.columns else repeat(None)
+                
+                # 同一批数据使用同一个当前时间解析"5分钟前"等相对时间，相同字符串只解析一次
+                now = datetime.now()
+                time_cache = {}
+                added = 0
+                for key, author, content, publish_time, reposts, comments, likes, kw, url in zip(
+                        ids, df['微博作者'], df['微博内容'], df['发布时间'], df['转发数'], df['评论数'], df['点赞数'],
+                        keywords, urls):
+                    first = key not in self._ingested_ids
+                    new_keyword = kw is not None and (kw, key) not in self._ingested_keywords
+                    if not first and not new_keyword:
+                        continue
+                    if new_keyword:
+                        self._ingested_keywords.add((kw, key))
+                    
+                    reposts, comments, likes = int(reposts), int(comments), int(likes)
+                    if first:
+                        self._ingested_ids.add(key)
+                        added += 1
+                        self.leaderboard.add((key, author, content, url), author, reposts, comments, likes)
+                    
+                    if publish_time in time_cache:
+                        ts = time_cache[publish_time]
+                    else:
+                        parsed = parse_publish_time(publish_time, now)
+                        ts = time_cache[publish_time] = to_timestamp(parsed) if parsed else None
+                    if ts is not None:
+                        self.rollup.add(ts, reposts, comments, likes, keyword=kw if new_keyword else None,
+                                        author=author if first else None, overall=first)
+                return added
+        except Exception as e:
+            print(f"写入汇总数据时出错: {str(e)}")
+            return 0
+    
+    def assign_duplicate_clusters(self, df):
+        """为每条微博分配近似重复簇id（写入'重复簇id'列）"""
+        if df.empty:
+            return df
+        
+        try:
+            with metrics.timer('dedup'):
+                keys = df['微博id'].astype(str) if '微博id' in df.columns else df.index.astype(str)
+                for key, content in zip(keys, df['微博内容']):
+                    self.dedup.add(key, self.clean_content(content))
+                
+                # 后加入的微博可能把两个簇连接起来，所以在全部加入后再取簇id
+                df['重复簇id'] = [self.dedup.cluster_of(key) for key in keys]
+                return df
+        except Exception as e:
+            print(f"检测重复微博时出错: {str(e)}")
+            return df
+    
+    def collapse_duplicates(self, df):
+        """将近似重复的微博合并为一条，保留每个簇中最先出现的微博"""
+        if df.empty:
+            return df
+        
+        if '重复簇id' not in df.columns:
+            df = self.assign_duplicate_clusters(df)
+            if '重复簇id' not in df.columns:
+                return df
+        
+        cluster_sizes = df['重复簇id'].map(df['重复簇id'].value_counts())
+        collapsed = df.assign(重复数=cluster_sizes).drop_duplicates(subset='重复簇id')
+        return collapsed
     
-    def get_basic_stats(self, df):
+    def filter_posts(self, df, author=None, min_engagement=0, collapse=False):
+        """按作者、最小互动数筛选微博，可选合并近似重复微博"""
+        if df.empty:
+            return df
+        
+        filtered_df = df
+        
+        # 按作者筛选
+        if author is not None:
+            filtered_df = filtered_df[filtered_df['微博作者'] == author]
+        
+        # 按互动数筛选
+        if min_engagement > 0:
+            total_engagement = filtered_df['转发数'] + filtered_df['评论数'] + filtered_df['点赞数']
+            filtered_df = filtered_df[total_engagement >= min_engagement]
+        
+        # 合并近似重复微博
+        if collapse:
+            filtered_df = self.collapse_duplicates(filtered_df)
+        
+        return filtered_df
+    
+    def get_basic_stats(self, df, collapse=False):
         """获取基础统计信息"""
         if df.empty:
             return {}
         
+        total_count = len(df)
+        if collapse:
+            df = self.collapse_duplicates(df)
+        
         stats = {
             '总微博数': len(df),
             '总转发数': df['转发数'].sum(),
@@ -25,50 +165,162 @@ class WeiboDataProcessor:
             '最热微博评论数': df['评论数'].max(),
             '最热微博点赞数': df['点赞数'].max()
         }
+        if collapse:
+            stats['合并重复微博数'] = total_count - len(df)
         return stats
     
-    def get_time_distribution(self, df):
-        """获取时间分布数据"""
+    def get_time_distribution(self, df=None):
+        """获取按小时的发布时间分布
+        
+        df 为空或正是已写入汇总的数据时直接读取小时汇总，不重新解析发布时间字符串；
+        否则与写入汇总时一样用 parse_publish_time 解析，两种方式结果一致。
+        """
+        if df is None or self._is_ingested(df):
+            return self._hour_series(dict(enumerate(self.rollup.hour_of_day())))
+        
         if df.empty:
             return None
         
         try:
-            # 过滤有效时间数据
-            valid_time_df = df[df['发布时间'] != 'N/A'].copy()
-            if valid_time_df.empty:
-                return None
-            
-            # 转换时间格式
-            valid_time_df['发布时间'] = pd.to_datetime(valid_time_df['发布时间'], errors='coerce')
-            valid_time_df = valid_time_df.dropna(subset=['发布时间'])
+            if self._use_parallel(df):
+                return self._hour_series(self.sharded.hour_counts(df))
             
-            if valid_time_df.empty:
-                return None
-            
-            # 按小时统计
-            valid_time_df['小时'] = valid_time_df['发布时间'].dt.hour
-            hourly_counts = valid_time_df['小时'].value_counts().sort_index()
-            
-            return hourly_counts
+            # 与写入汇总相同的解析方式，支持"5分钟前"、"今天 12:30"、"05月01日 12:30"等格式
+            counts = {}
+            for parsed in parse_publish_times(df['发布时间']):
+                if parsed is not None:
+                    counts[parsed.hour] = counts.get(parsed.hour, 0) + 1
+            return self._hour_series(counts)
         except Exception as e:
             print(f"处理时间分布数据时出错: {str(e)}")
             return None
     
-    def get_author_stats(self, df):
+    def _hour_series(self, counts):
+        """把 {小时: 微博数} 转为按小时排序的Series，没有数据时返回None"""
+        hourly_counts = pd.Series({hour: count for hour, count in sorted(counts.items()) if count},
+                                  dtype='int64', name='count')
+        hourly_counts.index.name = '小时'
+        return hourly_counts if not hourly_counts.empty else None
+    
+    def _is_ingested(self, df):
+        """df 是否与已写入汇总的数据完全一致"""
+        if not self._ingested_ids or len(df) != len(self._ingested_ids) or '微博id' not in df.columns:
+            return False
+        return bool(df['微博id'].astype(str).isin(self._ingested_ids).all())
+    
+    def get_period_totals(self, periods=(('最近1小时', 3600), ('最近24小时', 86400), ('最近7天', 7 * 86400))):
+        """汇总截至最新微博的各时间段指标（使用能覆盖区间的最粗时间桶）"""
+        if self.rollup.end is None:
+            return None
+        
+        try:
+            end = self.rollup.end + 1
+            rows = [self.rollup.totals(end - seconds, end) for _, seconds in periods]
+            return pd.DataFrame(rows, columns=list(METRICS), index=pd.Index([name for name, _ in periods], name='时间段'))
+        except Exception as e:
+            print(f"汇总时间段数据时出错: {str(e)}")
+            return None
+    
+    def get_trend(self, days=30, resolution='day', keyword=None, author=None):
+        """获取最近days天的发布趋势（基于增量汇总，不重新解析原始数据）"""
+        if self.rollup.end is None:
+            return None
+        
+        try:
+            # 以最新微博所在日的次日零点为终点
+            end = self.rollup.end - self.rollup.end % 86400 + 86400
+            start = end - days * 86400
+            series = self.rollup.series(start, end, resolution, keyword=keyword, author=author)
+            trend = pd.DataFrame([values for _, values in series], columns=list(METRICS),
+                                 index=pd.Index([from_timestamp(bucket) for bucket, _ in series], name='时间'))
+            return trend
+        except Exception as e:
+            print(f"处理发布趋势数据时出错: {str(e)}")
+            return None
+    
+    def get_spikes(self, days=7, resolution='hour', threshold=3.0, keyword=None, author=None):
+        """检测最近days天内微博数突增的时间段"""
+        if self.rollup.end is None:
+            return None
+        
+        try:
+            end = self.rollup.end + 1
+            start = end - days * 86400
+            spikes = self.rollup.detect_spikes(start, end, resolution, threshold=threshold,
+                                               keyword=keyword, author=author)
+            return pd.DataFrame([(from_timestamp(bucket), count, baseline, score)
+                                 for bucket, count, baseline, score in spikes],
+                                columns=['时间', '微博数', '基线', 'z分数'])
+        except Exception as e:
+            print(f"检测发布突增时出错: {str(e)}")
+            return None
+    
+    def get_top_authors(self, metric='微博数', k=10, df=None):
+        """获取流式排行榜中的热门作者（metric为'微博数'或'互动数'）
+        
+        传入df（如合并重复后的数据）时直接按该数据精确计算，最大误差为0。
+        """
+        check_metric(metric, Leaderboard.AUTHOR_METRICS)
+        if df is not None:
+            if df.empty:
+                return None
+            engagement = df['转发数'] + df['评论数'] + df['点赞数']
+            scores = (engagement.groupby(df['微博作者']).sum() if metric == '互动数'
+                      else df['微博作者'].value_counts())
+            top = [(author, int(score), 0) for author, score in scores.nlargest(k).items()]
+        else:
+            top = self.leaderboard.top_authors(metric, k)
+        if not top:
+            return None
+        
+        top_authors = pd.DataFrame(top, columns=['微博作者', metric, '最大误差']).set_index('微博作者')
+        return top_authors
+    
+    def get_top_posts(self, metric='互动数', k=10, df=None):
+        """获取流式排行榜中的热门微博（metric为'转发数'、'评论数'、'点赞数'或'互动数'）
+        
+        传入df时直接按该数据计算。
+        """
+        check_metric(metric, Leaderboard.POST_METRICS)
+        if df is not None:
+            if df.empty:
+                return None
+            scores = df['转发数'] + df['评论数'] + df['点赞数'] if metric == '互动数' else df[metric]
+            top_rows = df.loc[scores.nlargest(k).index]
+            top = [(int(score), (post_id, author, content, url)) for score, post_id, author, content, url
+                   in zip(scores.loc[top_rows.index], top_rows['微博id'], top_rows['微博作者'],
+                          top_rows['微博内容'], top_rows['url'])]
+        else:
+            top = self.leaderboard.top_posts(metric, k)
+        if not top:
+            return None
+        
+        top_posts = pd.DataFrame([(post_id, author, content, score, url)
+                                  for score, (post_id, author, content, url) in top],
+                                 columns=['微博id', '微博作者', '微博内容', metric, 'url'])
+        return top_posts
+    
+    def get_author_stats(self, df, collapse=False):
         """获取作者统计数据"""
         if df.empty:
             return None
         
         try:
-            author_stats = df.groupby('微博作者').agg({
-                '微博id': 'count',
-                '转发数': 'sum',
-                '评论数': 'sum',
-                '点赞数': 'sum'
-            }).rename(columns={'微博id': '微博数量'})
+            if collapse:
+                df = self.collapse_duplicates(df)
+            
+            if self._use_parallel(df):
+                author_stats = self.sharded.author_stats(df)
+            else:
+                author_stats = df.groupby('微博作者').agg({
+                    '微博id': 'count',
+                    '转发数': 'sum',
+                    '评论数': 'sum',
+                    '点赞数': 'sum'
+                }).rename(columns={'微博id': '微博数量'})
             
-            # 按微博数量排序，取前10
-            top_authors = author_stats.sort_values('微博数量', ascending=False).head(10)
+            # 按微博数量取前10（部分选择，无需对全部作者排序）
+            top_authors = author_stats.nlargest(10, '微博数量')
             return top_authors
         except Exception as e:
             print(f"处理作者统计数据时出错: {str(e)}")
@@ -80,7 +332,10 @@ class WeiboDataProcessor:
             return None
         
         try:
-            df['内容长度'] = df['微博内容'].astype(str).apply(len)
+            if self._use_parallel(df):
+                df['内容长度'] = self.sharded.content_lengths(df)
+            else:
+                df['内容长度'] = df['微博内容'].astype(str).apply(len)
             length_stats = {
                 '平均长度': round(df['内容长度'].mean(), 2),
                 '最长内容': df['内容长度'].max(),
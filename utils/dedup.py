@@ -0,0 +1,190 @@
+import re
+import zlib
+from array import array
+
+import numpy as np
+
+# 归一化时去除的噪声：链接、转发链、@提及、[表情]、标点与空白
+_URL_RE = re.compile(r'https?://\S+')
+_MENTION_RE = re.compile(r'//@[^:：\s]+[:：]?|@[\w\-]+')
+_EMOTICON_RE = re.compile(r'\[[^\[\]\s]{1,8}\]')
+_NOISE_RE = re.compile(r'[\W_]+')
+
+# 空桶占位值（有效值为 crc32 // num_perm，不会达到该值）
+_EMPTY = 0xFFFFFFFF
+
+
+class NearDuplicateDetector:
+    """近似重复微博检测器（单次置换MinHash + LSH分桶）
+
+    每条微博只计算一次签名，签名按band切分后放入哈希桶，
+    只有同桶的微博才做相似度校验，因此整体开销随微博数近似线性增长。
+    签名按行存放在一个numpy矩阵中，一条微博与所有候选代表微博的相似度一次批量计算。
+    """
+
+    def __init__(self, num_perm=32, bands=8, threshold=0.7, shingle_size=3, max_bucket_reps=8):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm 必须能被 bands 整除")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        # 每个桶最多保留的代表微博数，保证单条插入的校验次数有上界
+        self.max_bucket_reps = max_bucket_reps
+        self.clear()
+
+    def clear(self):
+        """清空所有签名和簇信息"""
+        self._parent = {}
+        self._order = {}
+        # 签名矩阵（容量不足时翻倍）及每行对应的微博key
+        self._matrix = np.empty((1024, self.num_perm), dtype=np.uint32)
+        self._keys = []
+        self._buckets = {}
+        self._exact = {}
+
+    def __len__(self):
+        return len(self._parent)
+
+    def __contains__(self, key):
+        return key in self._parent
+
+    def normalize(self, text):
+        """归一化微博文本，去掉不影响内容判断的部分"""
+        text = str(text)
+        # 'N/A' 是爬虫对缺失内容的占位
+        if text == 'N/A':
+            return ''
+        text = _URL_RE.sub('', text)
+        text = _MENTION_RE.sub('', text)
+        text = _EMOTICON_RE.sub('', text)
+        return _NOISE_RE.sub('', text).lower()
+
+    def signature(self, text):
+        """计算归一化文本的MinHash签名"""
+        k = self.num_perm
+        size = self.shingle_size
+        sig = array('I', [_EMPTY]) * k
+        if not text:
+            return sig
+
+        # 按UTF-32编码后每个字符定长4字节，可以直接切片得到shingle，避免逐个编码
+        data = text.encode('utf-32-le')
+        step = size * 4
+        last = max(len(data) - step, 0)
+        hashes = sorted(set(map(zlib.crc32, [data[i:i + step] for i in range(0, last + 1, 4)])), reverse=True)
+        # 降序写入，每个槽位最终保留的是落入该槽位的最小哈希
+        minimums = {h % k: h // k for h in hashes}
+        for slot, value in minimums.items():
+            sig[slot] = value
+        return sig
+
+    def similarity(self, sig_a, sig_b):
+        """根据签名估计两条微博的Jaccard相似度"""
+        same = total = 0
+        for a, b in zip(sig_a, sig_b):
+            if a == _EMPTY and b == _EMPTY:
+                continue
+            total += 1
+            if a == b:
+                same += 1
+        return same / total if total else 1.0
+
+    def add(self, key, text):
+        """加入一条微博并返回其所属簇id（已加入过的微博不会重复计算）"""
+        if key in self._parent:
+            return self.cluster_of(key)
+
+        self._parent[key] = key
+        self._order[key] = len(self._order)
+
+        normalized = self.normalize(text)
+        # 归一化后为空（N/A、纯表情、纯链接或纯@提及）时无法判断内容是否相同，单独成簇
+        if not normalized:
+            return key
+
+        # 归一化后完全相同的内容直接归入同一簇
+        exact_key = self._exact.get(normalized)
+        if exact_key is not None:
+            self._union(exact_key, key)
+            return self.cluster_of(key)
+        self._exact[normalized] = key
+
+        sig = self.signature(normalized)
+        row = self._store_signature(key, sig)
+
+        # 先收集各band桶中的候选代表微博（已在前面的桶中校验过的不再重复），再批量计算相似度
+        data = sig.tobytes()
+        width = self.rows * sig.itemsize
+        empty_band = _EMPTY.to_bytes(sig.itemsize, 'little') * self.rows
+        checked = {}
+        bands = []
+        for band in range(self.bands):
+            values = data[band * width:(band + 1) * width]
+            if values == empty_band:
+                continue
+            bucket_key = hash((band, values))
+            reps = self._buckets.get(bucket_key)
+            if reps is None:
+                self._buckets[bucket_key] = [row]
+                continue
+            fresh = [rep for rep in reps if rep not in checked]
+            checked.update(dict.fromkeys(fresh))
+            bands.append((reps, fresh))
+
+        if bands:
+            similar = self._similar_rows(row, list(checked))
+            for reps, fresh in bands:
+                matched = False
+                for rep in fresh:
+                    if rep in similar:
+                        self._union(self._keys[rep], key)
+                        matched = True
+                if not matched and len(reps) < self.max_bucket_reps:
+                    reps.append(row)
+
+        return self.cluster_of(key)
+
+    def _store_signature(self, key, sig):
+        """把签名写入矩阵的下一行，返回行号（桶中保存的是行号）"""
+        row = len(self._keys)
+        if row == len(self._matrix):
+            self._matrix = np.concatenate([self._matrix, np.empty_like(self._matrix)])
+        self._matrix[row] = np.frombuffer(sig, dtype=np.uint32)
+        self._keys.append(key)
+        return row
+
+    def _similar_rows(self, row, candidates):
+        """批量估计第row行签名与候选行的相似度（与 similarity 的计算方式相同），返回达到阈值的候选行"""
+        matrix = self._matrix[candidates]
+        target = self._matrix[row]
+        equal = matrix == target
+        # 两边都为空的槽位不计入
+        both_empty = equal[:, target == _EMPTY].sum(axis=1)
+        same = equal.sum(axis=1) - both_empty
+        total = self.num_perm - both_empty
+        scores = np.where(total > 0, same / np.maximum(total, 1), 1.0)
+        return {rep for rep, ok in zip(candidates, (scores >= self.threshold).tolist()) if ok}
+
+    def cluster_of(self, key):
+        """返回微博所属簇id（簇内最早加入的微博key）"""
+        parent = self._parent
+        root = key
+        while parent[root] != root:
+            root = parent[root]
+        # 路径压缩
+        while parent[key] != root:
+            parent[key], key = root, parent[key]
+        return root
+
+    def _union(self, a, b):
+        root_a = self.cluster_of(a)
+        root_b = self.cluster_of(b)
+        if root_a == root_b:
+            return
+        # 保留更早加入的微博作为簇id，保证增量加入时簇id稳定
+        if self._order[root_a] <= self._order[root_b]:
+            self._parent[root_b] = root_a
+        else:
+            self._parent[root_a] = root_b
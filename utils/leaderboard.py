@@ -0,0 +1,187 @@
+import heapq
+from itertools import count
+from operator import itemgetter
+
+
+def check_metric(metric, metrics):
+    """检查排行指标是否受支持，不支持时抛出ValueError"""
+    if metric not in metrics:
+        raise ValueError(f"不支持的排行指标: {metric}（可用: {', '.join(metrics)}）")
+
+
+class TopKHeap:
+    """固定容量的最小堆，保留得分最高的k个条目
+
+    适用于每个条目只写入一次的场景（如单条微博），写入O(log k)，读取O(k log k)。
+    得分相同时保留先写入的条目。
+    """
+
+    def __init__(self, k=10):
+        self.k = k
+        self.clear()
+
+    def clear(self):
+        self._heap = []
+        self._seq = count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, score, item):
+        """写入一个条目，返回是否进入榜单"""
+        # 序号取负，得分相同时后写入的条目先被淘汰
+        entry = (score, -next(self._seq), item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+            return True
+        if entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+            return True
+        return False
+
+    def items(self):
+        """按得分从高到低返回 (得分, 条目) 列表"""
+        return [(score, item) for score, _, item in sorted(self._heap, reverse=True)]
+
+
+class SpaceSaving:
+    """Space-Saving 热门key计数器
+
+    不同key的数量不超过capacity时结果是精确的；超过后只保留capacity个计数器，
+    新key替换当前计数最小的key并继承其计数，每个key的高估量不超过被替换时的最小计数。
+    capacity为None时不限制内存，始终精确计数。
+    另外维护计数最高的track个key，读取排行只需排序这几个key（weight须非负）。
+    """
+
+    def __init__(self, capacity=10000, track=10):
+        self.capacity = capacity
+        self.track = track
+        self.clear()
+
+    def clear(self):
+        self._counts = {}
+        self._errors = {}
+        # 计数器满了之后才维护的最小堆，元素可能过期，淘汰时惰性跳过
+        self._heap = None
+        # 当前计数最高的key及其计数；计数只增不减，不在其中的key只有超过_floor才可能进入
+        self._top = {}
+        self._floor = 0
+
+    def __len__(self):
+        return len(self._counts)
+
+    @property
+    def exact(self):
+        """当前结果是否精确（从未发生过淘汰）"""
+        return self._heap is None
+
+    def add(self, key, weight=1):
+        """累加key的计数"""
+        counts = self._counts
+        if key in counts:
+            counts[key] += weight
+        elif self.capacity is None or len(counts) < self.capacity:
+            counts[key] = weight
+            self._errors[key] = 0
+        else:
+            min_key, min_count = self._pop_min()
+            del counts[min_key]
+            del self._errors[min_key]
+            counts[key] = min_count + weight
+            self._errors[key] = min_count
+            if min_key in self._top:
+                # 只有不同key很少时才会淘汰到榜内的key，此时重建代价也很小
+                self._rebuild_top()
+
+        if self._heap is not None:
+            heapq.heappush(self._heap, (counts[key], key))
+            # 过期元素过多时重建，保证堆的大小与capacity同阶
+            if len(self._heap) > 2 * self.capacity:
+                self._rebuild_heap()
+        self._update_top(key, counts[key])
+
+    def _update_top(self, key, value):
+        top = self._top
+        if key in top or len(top) < self.track:
+            top[key] = value
+            return
+        if value <= self._floor:
+            return
+        min_key = min(top, key=top.get)
+        if value > top[min_key]:
+            del top[min_key]
+            top[key] = value
+        self._floor = min(top.values())
+
+    def _rebuild_top(self):
+        self._top = dict(heapq.nlargest(self.track, self._counts.items(), key=itemgetter(1)))
+        self._floor = min(self._top.values()) if len(self._top) >= self.track else 0
+
+    def _rebuild_heap(self):
+        self._heap = [(value, key) for key, value in self._counts.items()]
+        heapq.heapify(self._heap)
+
+    def _pop_min(self):
+        if self._heap is None:
+            self._rebuild_heap()
+        counts = self._counts
+        while True:
+            value, key = heapq.heappop(self._heap)
+            if counts.get(key) == value:
+                return key, value
+
+    def count(self, key):
+        return self._counts.get(key, 0)
+
+    def error(self, key):
+        """key计数的最大高估量"""
+        return self._errors.get(key, 0)
+
+    def top(self, k=10):
+        """返回计数最高的k个 (key, 计数, 最大高估量)
+
+        k不超过track时只排序已维护的榜单；更大的k会扩大track并重建一次。
+        """
+        if k > self.track:
+            self.track = k
+            self._rebuild_top()
+        top = sorted(self._top.items(), key=itemgetter(1), reverse=True)[:k]
+        return [(key, value, self._errors[key]) for key, value in top]
+
+
+class Leaderboard:
+    """微博和作者的流式排行榜，随数据写入实时更新"""
+
+    POST_METRICS = ('转发数', '评论数', '点赞数', '互动数')
+    AUTHOR_METRICS = ('微博数', '互动数')
+
+    def __init__(self, k=10, author_capacity=10000):
+        self.k = k
+        self.authors = {metric: SpaceSaving(author_capacity, track=k) for metric in self.AUTHOR_METRICS}
+        self.posts = {metric: TopKHeap(k) for metric in self.POST_METRICS}
+
+    def clear(self):
+        for counter in self.authors.values():
+            counter.clear()
+        for heap in self.posts.values():
+            heap.clear()
+
+    def add(self, post, author, reposts, comments, likes):
+        """写入一条微博，post为排行榜中展示的微博信息"""
+        engagement = reposts + comments + likes
+        self.authors['微博数'].add(author)
+        self.authors['互动数'].add(author, engagement)
+
+        posts = self.posts
+        posts['转发数'].push(reposts, post)
+        posts['评论数'].push(comments, post)
+        posts['点赞数'].push(likes, post)
+        posts['互动数'].push(engagement, post)
+
+    def top_authors(self, metric='微博数', k=None):
+        check_metric(metric, self.AUTHOR_METRICS)
+        return self.authors[metric].top(k or self.k)
+
+    def top_posts(self, metric='互动数', k=None):
+        check_metric(metric, self.POST_METRICS)
+        return self.posts[metric].items()[:k or self.k]
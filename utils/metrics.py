@@ -0,0 +1,189 @@
+import os
+import json
+import time
+import atexit
+import cProfile
+import pstats
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+
+class _NullTimer:
+    """未启用统计时使用的空计时器"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ('_metrics', '_name', '_start')
+
+    def __init__(self, metrics, name):
+        self._metrics = metrics
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._metrics.observe(self._name, time.perf_counter() - self._start)
+        return False
+
+
+class Metrics:
+    """各阶段耗时和计数统计
+
+    未启用时 timer() 返回共享的空计时器、count() 直接返回，热路径上几乎没有额外开销。
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """清空已有统计"""
+        with self._lock:
+            # 阶段名 -> [次数, 总耗时, 最大耗时]
+            self._timers = {}
+            self._counters = {}
+
+    def timer(self, name):
+        """返回统计name阶段耗时的上下文管理器"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def observe(self, name, seconds):
+        """记录一次耗时"""
+        with self._lock:
+            values = self._timers.get(name)
+            if values is None:
+                self._timers[name] = [1, seconds, seconds]
+            else:
+                values[0] += 1
+                values[1] += seconds
+                if seconds > values[2]:
+                    values[2] = seconds
+
+    def count(self, name, value=1):
+        """累加计数器"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def snapshot(self):
+        """返回当前统计的副本"""
+        with self._lock:
+            timers = {
+                name: {
+                    'count': count,
+                    'total_seconds': round(total, 6),
+                    'mean_seconds': round(total / count, 6),
+                    'max_seconds': round(maximum, 6),
+                }
+                for name, (count, total, maximum) in self._timers.items()
+            }
+            counters = dict(self._counters)
+        return {'timers': timers, 'counters': counters}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self, prefix='weibo'):
+        """导出为 Prometheus 文本格式"""
+        snapshot = self.snapshot()
+        lines = [
+            f'# HELP {prefix}_phase_seconds_total 各阶段累计耗时（秒）',
+            f'# TYPE {prefix}_phase_seconds_total counter',
+        ]
+        for name, values in sorted(snapshot['timers'].items()):
+            lines.append(f'{prefix}_phase_seconds_total{{phase="{name}"}} {values["total_seconds"]}')
+        lines += [
+            f'# HELP {prefix}_phase_calls_total 各阶段执行次数',
+            f'# TYPE {prefix}_phase_calls_total counter',
+        ]
+        for name, values in sorted(snapshot['timers'].items()):
+            lines.append(f'{prefix}_phase_calls_total{{phase="{name}"}} {values["count"]}')
+        lines += [
+            f'# HELP {prefix}_phase_seconds_max 各阶段单次最大耗时（秒）',
+            f'# TYPE {prefix}_phase_seconds_max gauge',
+        ]
+        for name, values in sorted(snapshot['timers'].items()):
+            lines.append(f'{prefix}_phase_seconds_max{{phase="{name}"}} {values["max_seconds"]}')
+        for name, value in sorted(snapshot['counters'].items()):
+            lines.append(f'# TYPE {prefix}_{name}_total counter')
+            lines.append(f'{prefix}_{name}_total {value}')
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path):
+        """写入文件，.prom/.txt 为 Prometheus 文本格式，其余为JSON"""
+        text = self.to_prometheus() if path.endswith(('.prom', '.txt')) else self.to_json()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def format_table(self):
+        """格式化为便于阅读的文本表格"""
+        snapshot = self.snapshot()
+        lines = [f"{'阶段':<10}{'次数':>8}{'总耗时(秒)':>14}{'平均(毫秒)':>14}{'最大(毫秒)':>14}"]
+        for name, values in sorted(snapshot['timers'].items(), key=lambda item: -item[1]['total_seconds']):
+            lines.append(f"{name:<10}{values['count']:>8}{values['total_seconds']:>14.3f}"
+                         f"{values['mean_seconds'] * 1000:>14.1f}{values['max_seconds'] * 1000:>14.1f}")
+        if snapshot['counters']:
+            lines.append('')
+            for name, value in sorted(snapshot['counters'].items()):
+                lines.append(f"{name}: {value:,}")
+        return '\n'.join(lines)
+
+
+# 全局统计实例：设置环境变量 WEIBO_METRICS=1 时启用，
+# 设置 WEIBO_METRICS_DUMP=文件路径 时在进程退出时自动导出（适合无界面运行）
+metrics = Metrics(enabled=os.environ.get('WEIBO_METRICS') == '1' or bool(os.environ.get('WEIBO_METRICS_DUMP')))
+
+if os.environ.get('WEIBO_METRICS_DUMP'):
+    atexit.register(metrics.dump, os.environ['WEIBO_METRICS_DUMP'])
+
+
+@contextmanager
+def profile_session(output_dir, label='crawl', top=30):
+    """对代码块进行 cProfile 和 tracemalloc 采样，结果写入output_dir
+
+    生成 <label>_<时间>.prof（可用 snakeviz 等工具查看）、.txt 耗时摘要和 _memory.txt 内存分配摘要。
+    cProfile 只统计调用线程，因此应在执行爬取的线程中使用。
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    base = os.path.join(output_dir, f"{label}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+
+    started_tracemalloc = not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield base
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if started_tracemalloc:
+            tracemalloc.stop()
+
+        profiler.dump_stats(base + '.prof')
+        with open(base + '.txt', 'w', encoding='utf-8') as f:
+            pstats.Stats(profiler, stream=f).sort_stats('cumulative').print_stats(top)
+        with open(base + '_memory.txt', 'w', encoding='utf-8') as f:
+            f.write(f"当前内存: {current / 1024 / 1024:.2f} MB, 峰值内存: {peak / 1024 / 1024:.2f} MB\n\n")
+            for stat in snapshot.statistics('lineno')[:top]:
+                f.write(f"{stat}\n")
@@ -0,0 +1,250 @@
+import os
+import weakref
+import multiprocessing as mp
+from datetime import datetime
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from utils.rollup import parse_publish_times
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python 3.7 没有共享内存模块，数值列退化为随分片序列化
+    shared_memory = None
+
+# 不使用 fork：界面线程和爬取事件循环线程运行时 fork 出的子进程可能继承被持有的锁
+_START_METHOD = 'forkserver' if 'forkserver' in mp.get_all_start_methods() else 'spawn'
+
+# 文本列在共享内存中以该字符分隔，内容中出现时该列退化为随分片序列化
+_TEXT_SEP = '\x00'
+
+
+def _open_block(name):
+    try:
+        # Python 3.13+：子进程只挂载，不登记到资源回收器，避免提前释放
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedColumns:
+    """把列数据放入共享内存，子进程按名字挂载，避免逐分片序列化整列数据
+
+    数值列按原始类型存放；文本列按分片拼接为UTF-8字节，子进程只解码自己的分片。
+    """
+
+    def __init__(self):
+        self._blocks = {}
+        self._arrays = {}
+        self.specs = {}
+        self.text_specs = {}
+
+    def put(self, name, values):
+        """复制一列数据到共享内存"""
+        array = self.allocate(name, len(values), values.dtype)
+        array[:] = values
+        return array
+
+    def allocate(self, name, length, dtype):
+        """分配一块共享内存作为输出列"""
+        dtype = np.dtype(dtype)
+        block = shared_memory.SharedMemory(create=True, size=max(length * dtype.itemsize, 1))
+        array = np.ndarray((length,), dtype=dtype, buffer=block.buf)
+        self._blocks[name] = block
+        self._arrays[name] = array
+        self.specs[name] = (block.name, length, dtype.str)
+        return array
+
+    def put_text(self, name, values, bounds):
+        """把字符串列按分片编码后写入共享内存，内容含分隔符时返回False"""
+        chunks = []
+        for start, stop in bounds:
+            joined = _TEXT_SEP.join(values[start:stop])
+            if joined.count(_TEXT_SEP) != max(stop - start - 1, 0):
+                return False
+            chunks.append(joined.encode('utf-8'))
+
+        block = shared_memory.SharedMemory(create=True, size=max(sum(map(len, chunks)), 1))
+        offsets = []
+        position = 0
+        for chunk in chunks:
+            block.buf[position:position + len(chunk)] = chunk
+            offsets.append((position, position + len(chunk)))
+            position += len(chunk)
+        self._blocks[name] = block
+        self.text_specs[name] = (block.name, offsets)
+        return True
+
+    def array(self, name):
+        return self._arrays[name]
+
+    def close(self):
+        self._arrays.clear()
+        for block in self._blocks.values():
+            block.close()
+            block.unlink()
+        self._blocks.clear()
+        self.specs.clear()
+        self.text_specs.clear()
+
+
+class _ShardView:
+    """子进程中一个分片可见的列：数值列为共享内存视图，文本列从共享内存解码或随任务序列化"""
+
+    def __init__(self, task):
+        specs, text_specs, index, self.start, self.stop, arrays = task
+        self._blocks = []
+        self.columns = {}
+        for name, (block_name, length, dtype) in specs.items():
+            block = self._open(block_name)
+            self.columns[name] = np.ndarray((length,), dtype=dtype, buffer=block.buf)[self.start:self.stop]
+        for name, (block_name, offsets) in text_specs.items():
+            block = self._open(block_name)
+            begin, end = offsets[index]
+            text = bytes(block.buf[begin:end]).decode('utf-8')
+            self.columns[name] = np.array(text.split(_TEXT_SEP) if self.stop > self.start else [], dtype=object)
+        self.columns.update(arrays)
+
+    def _open(self, block_name):
+        block = _open_block(block_name)
+        self._blocks.append(block)
+        return block
+
+    def __enter__(self):
+        return self.columns
+
+    def __exit__(self, *exc):
+        self.columns.clear()
+        for block in self._blocks:
+            try:
+                block.close()
+            except BufferError:
+                # 仍有对象引用共享内存时交给进程退出时回收
+                pass
+        return False
+
+
+def _author_partial(task):
+    with _ShardView(task) as columns:
+        frame = pd.DataFrame({
+            '微博作者': columns['微博作者'],
+            '微博数量': columns['有效id'],
+            '转发数': columns['转发数'],
+            '评论数': columns['评论数'],
+            '点赞数': columns['点赞数'],
+        })
+        return frame.groupby('微博作者').sum()
+
+
+def _content_length_partial(task):
+    with _ShardView(task) as columns:
+        columns['内容长度'][:] = [len(str(content)) for content in columns['微博内容']]
+    return None
+
+
+def _hour_partial(task, now):
+    counts = {}
+    with _ShardView(task) as columns:
+        # 与单进程路径相同，用 parse_publish_time 逐个解析，所有分片使用同一个当前时间
+        for parsed in parse_publish_times(columns['发布时间'], now):
+            if parsed is not None:
+                counts[parsed.hour] = counts.get(parsed.hour, 0) + 1
+    return counts
+
+
+class ShardedAnalytics:
+    """把数据按行切分为多个分片，在进程池中计算部分聚合后再合并
+
+    数值列和全部为字符串的文本列通过共享内存传给子进程，其他列只序列化各自分片。
+    子进程通过 forkserver（不支持时为 spawn）启动，不复制父进程中运行的其他线程；
+    进程池在第一次使用时创建并一直复用，直到调用 close()。合并后的结果与单进程计算一致。
+    """
+
+    def __init__(self, workers=None, min_shard_rows=100000):
+        self.workers = workers or os.cpu_count() or 1
+        # 每个分片的最小行数，数据太少时并行得不偿失
+        self.min_shard_rows = min_shard_rows
+        self._pool = None
+        self._finalizer = None
+
+    @property
+    def available(self):
+        return shared_memory is not None and self.workers > 1
+
+    def shard_bounds(self, length):
+        """返回各分片的 (起始行, 结束行)"""
+        count = max(1, min(self.workers, length // self.min_shard_rows))
+        edges = np.linspace(0, length, count + 1).astype(int)
+        return list(zip(edges[:-1], edges[1:]))
+
+    def _get_pool(self):
+        if self._pool is None:
+            context = mp.get_context(_START_METHOD)
+            if _START_METHOD == 'forkserver':
+                # 服务进程预先导入pandas等依赖，之后每个子进程无需重复导入
+                context.set_forkserver_preload([__name__])
+            self._pool = context.Pool(self.workers)
+            # 对象被回收或进程退出时结束子进程
+            self._finalizer = weakref.finalize(self, self._pool.terminate)
+        return self._pool
+
+    def close(self):
+        """结束常驻的进程池"""
+        if self._pool is not None:
+            self._finalizer()
+            self._pool = None
+
+    def _map(self, func, columns, outputs=()):
+        """在进程池中对每个分片执行func，返回 (各分片结果, 输出列)"""
+        length = len(next(iter(columns.values())))
+        bounds = self.shard_bounds(length)
+
+        shared = SharedColumns()
+        try:
+            texts = {}
+            for name, values in columns.items():
+                if values.dtype.kind in 'biuf':
+                    shared.put(name, values)
+                elif pd.api.types.infer_dtype(values, skipna=False) != 'string' or \
+                        not shared.put_text(name, values, bounds):
+                    texts[name] = values
+            for name, dtype in outputs:
+                shared.allocate(name, length, dtype)
+
+            tasks = [(shared.specs, shared.text_specs, index, start, stop,
+                      {name: values[start:stop] for name, values in texts.items()})
+                     for index, (start, stop) in enumerate(bounds)]
+            results = self._get_pool().map(func, tasks)
+            output_arrays = {name: shared.array(name).copy() for name, _ in outputs}
+            return results, output_arrays
+        finally:
+            shared.close()
+
+    def author_stats(self, df):
+        """按作者汇总微博数量和互动数，结果与单进程 groupby 一致"""
+        columns = {
+            '微博作者': df['微博作者'].to_numpy(),
+            '有效id': df['微博id'].notna().to_numpy().astype(np.int64),
+            '转发数': df['转发数'].to_numpy(),
+            '评论数': df['评论数'].to_numpy(),
+            '点赞数': df['点赞数'].to_numpy(),
+        }
+        partials, _ = self._map(_author_partial, columns)
+        return pd.concat(partials).groupby(level=0).sum()
+
+    def content_lengths(self, df):
+        """计算每条微博的内容长度"""
+        _, outputs = self._map(_content_length_partial, {'微博内容': df['微博内容'].to_numpy()},
+                               outputs=[('内容长度', np.int64)])
+        return pd.Series(outputs['内容长度'], index=df.index)
+
+    def hour_counts(self, df):
+        """按小时统计发布数量，返回 {小时: 微博数}"""
+        partials, _ = self._map(partial(_hour_partial, now=datetime.now()), {'发布时间': df['发布时间'].to_numpy()})
+        counts = {}
+        for partial_counts in partials:
+            for hour, count in partial_counts.items():
+                counts[hour] = counts.get(hour, 0) + count
+        return counts
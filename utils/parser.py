@@ -0,0 +1,320 @@
+import re
+import json
+import html
+from array import array
+
+from utils.metrics import metrics
+
+try:
+    from lxml import html as lxml_html
+except ImportError:  # lxml 为可选依赖，未安装时只能使用纯Python解析
+    lxml_html = None
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# 与爬虫输出一致的列
+COLUMNS = ['微博id', '微博作者', '微博内容', '发布时间', '转发数', '评论数', '点赞数', 'url']
+_COUNT_COLUMNS = ('转发数', '评论数', '点赞数')
+
+_COUNT_RE = re.compile(r'(\d+(?:\.\d+)?)\s*(万|亿)?')
+_COUNT_UNITS = {None: 1, '万': 10000, '亿': 100000000}
+
+# 移动端接口的 created_at，如 "Sat May 01 12:30:00 +0800 2024"
+_CREATED_AT_RE = re.compile(r'^[A-Za-z]{3} ([A-Za-z]{3}) (\d{2}) (\d{2}):(\d{2}):\d{2} [+-]\d{4} (\d{4})$')
+_MONTHS = {name: index for index, name in enumerate(
+    ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'), 1)}
+
+# 搜索结果页底部的"下一页"链接，末页没有
+_NEXT_PAGE_RE = re.compile(r'<a\b[^>]*\bclass="next"')
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_SPACE_RE = re.compile(r'[\s\u200b]+')
+
+
+def parse_count(text):
+    """把互动数文本转为整数，如 "1.2万" -> 12000、"1,234" -> 1234、"转发"/"赞" -> 0、"100+" -> 100"""
+    if isinstance(text, int):
+        return text
+    if not isinstance(text, str):
+        # JSON中的 null、浮点数等
+        try:
+            return int(text or 0)
+        except (TypeError, ValueError):
+            return 0
+    # 绝大多数互动数是纯数字，直接转换
+    if text.isdigit():
+        return int(text)
+    # 去掉千位分隔符，否则 "1,234" 只会匹配到 1
+    if ',' in text or '，' in text:
+        text = text.replace(',', '').replace('，', '')
+    match = _COUNT_RE.search(text)
+    if match is None:
+        return 0
+    number, unit = match.groups()
+    if unit is None and '.' not in number:
+        return int(number)
+    return int(round(float(number) * _COUNT_UNITS[unit]))
+
+
+def normalize_created_at(text):
+    """把接口的 "Sat May 01 12:30:00 +0800 2024" 转为 "2024-05-01 12:30"（保留原时区的时间），其他格式原样返回"""
+    match = _CREATED_AT_RE.match(text) if isinstance(text, str) else None
+    if match is None or match.group(1) not in _MONTHS:
+        return text
+    month, day, hour, minute, year = match.groups()
+    return f"{year}-{_MONTHS[month]:02d}-{day} {hour}:{minute}"
+
+
+def clean_text(text):
+    """去掉HTML标签和多余空白，还原HTML实体"""
+    if '<' in text:
+        text = _TAG_RE.sub('', text)
+    if '&' in text:
+        text = html.unescape(text)
+    return _SPACE_RE.sub(' ', text).strip()
+
+
+def normalize_url(url):
+    """把 //weibo.com/... 补全为https链接并去掉跟踪参数"""
+    url = url.split('?', 1)[0]
+    if url.startswith('//'):
+        return 'https:' + url
+    return url
+
+
+class ColumnBuffers:
+    """按列预分配的解析结果缓冲区
+
+    解析器把每条微博的字段直接写入对应列，互动数列使用紧凑的整数数组，
+    避免为每条微博创建字典；全部解析完成后一次性构建DataFrame。
+    """
+
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.size = 0
+        self._text = {name: [None] * capacity for name in COLUMNS if name not in _COUNT_COLUMNS}
+        self._counts = {name: array('q', bytes(8 * capacity)) for name in _COUNT_COLUMNS}
+        self._columns = tuple(self._counts[name] if name in self._counts else self._text[name]
+                              for name in COLUMNS)
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self):
+        extra = self.capacity
+        for column in self._text.values():
+            column.extend([None] * extra)
+        for column in self._counts.values():
+            column.extend(array('q', bytes(8 * extra)))
+        self.capacity += extra
+
+    def append(self, mid, author, content, publish_time, reposts, comments, likes, url):
+        """写入一条微博（字段顺序与COLUMNS一致）"""
+        index = self.size
+        if index == self.capacity:
+            self._grow()
+        columns = self._columns
+        columns[0][index] = mid
+        columns[1][index] = author
+        columns[2][index] = content
+        columns[3][index] = publish_time
+        columns[4][index] = reposts
+        columns[5][index] = comments
+        columns[6][index] = likes
+        columns[7][index] = url
+        self.size = index + 1
+
+    def extend(self, other):
+        """追加另一个缓冲区中的全部微博"""
+        size, count = self.size, other.size
+        while size + count > self.capacity:
+            self._grow()
+        for column, source in zip(self._columns, other._columns):
+            column[size:size + count] = source[:count]
+        self.size = size + count
+
+    def clear(self):
+        """清空内容但保留已分配的空间"""
+        self.size = 0
+
+    def to_frame(self):
+        """构建与爬虫输出一致的DataFrame"""
+        import numpy as np
+        import pandas as pd
+
+        size = self.size
+        data = {}
+        for name in COLUMNS:
+            if name in self._counts:
+                data[name] = np.frombuffer(self._counts[name], dtype=np.int64, count=size).copy()
+            else:
+                data[name] = self._text[name][:size]
+        return pd.DataFrame(data, columns=COLUMNS)
+
+
+# 纯Python后端使用的预编译正则，按 s.weibo.com 搜索结果页结构匹配
+_CARD_SPLIT_RE = re.compile(r'<div class="card-wrap"[^>]*?\smid="(\d+)"')
+_NAME_RE = re.compile(r'class="name"[^>]*?nick-name="([^"]*)"|nick-name="([^"]*)"[^>]*?class="name"')
+_CONTENT_FULL_RE = re.compile(r'<p class="txt"[^>]*node-type="feed_list_content_full"[^>]*>(.*?)</p>', re.S)
+_CONTENT_RE = re.compile(r'<p class="txt"[^>]*node-type="feed_list_content"[^>]*>(.*?)</p>', re.S)
+_FROM_RE = re.compile(r'<div class="from"[^>]*>\s*<a href="([^"]*)"[^>]*>(.*?)</a>', re.S)
+_FORWARD_RE = re.compile(r'action-type="feed_list_forward"[^>]*>(.*?)</a>', re.S)
+_COMMENT_RE = re.compile(r'action-type="feed_list_comment"[^>]*>(.*?)</a>', re.S)
+_LIKE_RE = re.compile(r'class="woo-like-count"[^>]*>(.*?)</span>', re.S)
+
+
+def _group(pattern, text, default=''):
+    match = pattern.search(text)
+    return match.group(1) if match else default
+
+
+class _RegexBackend:
+    """纯Python解析后端（正则），无额外依赖"""
+
+    name = 'python'
+
+    def parse_html(self, page, buffers):
+        parts = _CARD_SPLIT_RE.split(page)
+        # split 结果为 [页头, mid1, 卡片1, mid2, 卡片2, ...]
+        for i in range(1, len(parts) - 1, 2):
+            mid, card = parts[i], parts[i + 1]
+            name = _NAME_RE.search(card)
+            author = html.unescape(name.group(1) or name.group(2)) if name else 'N/A'
+            content = _group(_CONTENT_FULL_RE, card) or _group(_CONTENT_RE, card)
+            from_match = _FROM_RE.search(card)
+            if from_match:
+                url = normalize_url(from_match.group(1))
+                publish_time = clean_text(from_match.group(2))
+            else:
+                url = None
+                publish_time = 'N/A'
+            buffers.append(
+                mid,
+                author,
+                clean_text(content) if content else 'N/A',
+                publish_time or 'N/A',
+                parse_count(clean_text(_group(_FORWARD_RE, card))),
+                parse_count(clean_text(_group(_COMMENT_RE, card))),
+                parse_count(clean_text(_group(_LIKE_RE, card))),
+                url,
+            )
+        return len(parts) // 2
+
+
+class _LxmlBackend:
+    """lxml 解析后端（C实现的HTML解析和XPath），需要安装lxml"""
+
+    name = 'lxml'
+
+    def parse_html(self, page, buffers):
+        tree = lxml_html.fromstring(page)
+        cards = tree.xpath('//div[@class="card-wrap"][@mid]')
+        for card in cards:
+            names = card.xpath('.//a[@class="name"]/@nick-name')
+            contents = (card.xpath('.//p[@node-type="feed_list_content_full"]')
+                        or card.xpath('.//p[@node-type="feed_list_content"]'))
+            links = card.xpath('.//div[@class="from"]/a[1]')
+            forward = card.xpath('.//a[@action-type="feed_list_forward"]')
+            comment = card.xpath('.//a[@action-type="feed_list_comment"]')
+            like = card.xpath('.//span[@class="woo-like-count"]')
+
+            content = _SPACE_RE.sub(' ', contents[0].text_content()).strip() if contents else ''
+            if links:
+                url = normalize_url(links[0].get('href', ''))
+                publish_time = _SPACE_RE.sub(' ', links[0].text_content()).strip()
+            else:
+                url = None
+                publish_time = ''
+            buffers.append(
+                card.get('mid'),
+                names[0] if names else 'N/A',
+                content or 'N/A',
+                publish_time or 'N/A',
+                parse_count(forward[0].text_content().strip()) if forward else 0,
+                parse_count(comment[0].text_content().strip()) if comment else 0,
+                parse_count(like[0].text_content().strip()) if like else 0,
+                url,
+            )
+        return len(cards)
+
+
+_BACKENDS = {'python': _RegexBackend}
+if lxml_html is not None:
+    _BACKENDS['lxml'] = _LxmlBackend
+
+
+def available_backends():
+    """返回当前环境可用的解析后端"""
+    return list(_BACKENDS)
+
+
+class WeiboPageParser:
+    """微博搜索页解析器
+
+    支持 s.weibo.com 搜索结果HTML和 m.weibo.cn 接口JSON，解析结果写入ColumnBuffers。
+    backend 可选 'python'（预编译正则，速度最快）或 'lxml'（完整解析DOM，对页面结构变化更宽容，需要安装lxml），
+    'auto' 使用 'python'。
+    """
+
+    def __init__(self, backend='auto'):
+        if backend == 'auto':
+            backend = 'python'
+        if backend not in _BACKENDS:
+            raise ValueError(f"不支持的解析后端: {backend}（可用: {', '.join(available_backends())}）")
+        self.backend = _BACKENDS[backend]()
+
+    def parse(self, text, buffers):
+        """解析一页内容（自动识别HTML或JSON），返回解析出的微博数"""
+        if isinstance(text, str) and text.lstrip()[:1] not in ('{', '['):
+            return self.parse_html(text, buffers)
+        return self.parse_json(text, buffers)
+
+    def has_next_page(self, text):
+        """搜索结果页是否带"下一页"链接，JSON无法判断时返回None"""
+        if isinstance(text, str) and text.lstrip()[:1] not in ('{', '['):
+            return _NEXT_PAGE_RE.search(text) is not None
+        return None
+
+    def parse_html(self, text, buffers):
+        """解析 s.weibo.com 搜索结果页"""
+        with metrics.timer('parse'):
+            rows = self.backend.parse_html(text, buffers)
+        metrics.count('rows_parsed', rows)
+        return rows
+
+    def parse_json(self, text, buffers):
+        """解析 m.weibo.cn 搜索接口返回的JSON（字符串或已解析的对象）"""
+        with metrics.timer('parse'):
+            rows = self._parse_json(text, buffers)
+        metrics.count('rows_parsed', rows)
+        return rows
+
+    def _parse_json(self, text, buffers):
+        data = _json_loads(text) if isinstance(text, (str, bytes)) else text
+        cards = (data.get('data') or {}).get('cards') or []
+        rows = 0
+        for card in cards:
+            # card_type 11 为卡片组，微博在 card_group 中
+            for item in card.get('card_group') or (card,):
+                mblog = item.get('mblog')
+                if not mblog:
+                    continue
+                user = mblog.get('user') or {}
+                uid = user.get('id')
+                bid = mblog.get('bid') or mblog.get('mid')
+                buffers.append(
+                    str(mblog.get('mid') or mblog.get('id')),
+                    user.get('screen_name', 'N/A'),
+                    clean_text(mblog.get('text', '')) or 'N/A',
+                    normalize_created_at(mblog.get('created_at') or 'N/A'),
+                    parse_count(mblog.get('reposts_count', 0)),
+                    parse_count(mblog.get('comments_count', 0)),
+                    parse_count(mblog.get('attitudes_count', 0)),
+                    f"https://weibo.com/{uid}/{bid}" if uid and bid else None,
+                )
+                rows += 1
+        return rows
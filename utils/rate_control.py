@@ -0,0 +1,93 @@
+import time
+import threading
+
+# 明确表示限流的状态码
+THROTTLE_STATUS = (418, 429)
+
+
+class AdaptiveRateController:
+    """AIMD 自适应请求速率控制器
+
+    从配置的请求间隔对应的速率开始。请求正常时每秒加性提高约 increase 次/秒；
+    遇到418/429时速率乘以 decrease，遇到疑似静默限流的空结果页、超时、5xx或延迟明显升高时乘以 soft_decrease。
+    速率始终限制在 [min_rate, max_rate] 之间（单位：次/秒）。
+    降速之前已经发出的请求返回的信号不会再次触发降速，避免同一批并发请求把速率连续减半。
+    """
+
+    def __init__(self, delay, max_rate=2.0, min_rate=1 / 60, increase=0.05, decrease=0.5, soft_decrease=0.8,
+                 latency_factor=2.0, min_latency=0.05, alpha=0.2):
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, max_rate)
+        self.increase = increase
+        self.decrease = decrease
+        self.soft_decrease = soft_decrease
+        self.latency_factor = latency_factor
+        self.min_latency = min_latency
+        self.alpha = alpha
+        self.rate = self._clamp(1.0 / delay if delay > 0 else max_rate)
+        # 平滑后的延迟和基线延迟（观察到的最低延迟，缓慢向上修正）
+        self.latency = None
+        self.base_latency = None
+        self.stats = {'ok': 0, 'throttled': 0, 'empty': 0, 'slow': 0, 'errors': 0, 'decreases': 0}
+        self._last_decrease = float('-inf')
+        self._lock = threading.Lock()
+
+    @property
+    def interval(self):
+        """当前请求间隔（秒）"""
+        return 1.0 / self.rate
+
+    def _clamp(self, rate):
+        return min(self.max_rate, max(self.min_rate, rate))
+
+    def record(self, status, latency=None, rows=None, sent_at=None):
+        """根据一次请求的结果调整速率，返回调整后的请求间隔（秒）
+
+        status 为HTTP状态码（请求异常时为None），latency 为响应耗时（秒），
+        rows 为该页解析出的微博数（超出结果末尾的空页应传None，不算作限流），
+        sent_at 为发出请求时的 time.monotonic()。
+        """
+        with self._lock:
+            if status in THROTTLE_STATUS:
+                self.stats['throttled'] += 1
+                self._decrease(self.decrease, sent_at)
+            elif status is None or status >= 500:
+                self.stats['errors'] += 1
+                self._decrease(self.soft_decrease, sent_at)
+            elif status == 200 and rows == 0:
+                # 微博限流时也可能直接返回空结果页
+                self.stats['empty'] += 1
+                self._decrease(self.soft_decrease, sent_at)
+            elif status == 200:
+                self.stats['ok'] += 1
+                if self._latency_too_high(latency):
+                    self.stats['slow'] += 1
+                    self._decrease(self.soft_decrease, sent_at)
+                else:
+                    # 每个成功请求增加 increase/rate，即每秒约增加 increase 次/秒
+                    self.rate = self._clamp(self.rate + self.increase / self.rate)
+            return self.interval
+
+    def _latency_too_high(self, latency):
+        if latency is None:
+            return False
+        if self.latency is None:
+            self.latency = self.base_latency = latency
+            return False
+        self.latency += self.alpha * (latency - self.latency)
+        if latency < self.base_latency:
+            self.base_latency = latency
+        else:
+            self.base_latency += 0.01 * (latency - self.base_latency)
+        return self.latency > self.latency_factor * max(self.base_latency, self.min_latency)
+
+    def _decrease(self, factor, sent_at):
+        if sent_at is not None and sent_at < self._last_decrease:
+            return
+        self.rate = self._clamp(self.rate * factor)
+        self._last_decrease = time.monotonic()
+        self.stats['decreases'] += 1
+
+    def describe(self):
+        """当前速率的简短描述，用于进度显示"""
+        return f"{self.rate:.2f} 次/秒（间隔 {self.interval:.2f} 秒）"
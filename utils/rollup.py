@@ -0,0 +1,233 @@
+import re
+import math
+from collections import deque
+from datetime import datetime, timedelta
+
+_EPOCH = datetime(1970, 1, 1)
+
+# 从细到粗的时间分辨率及其桶长度（秒）
+RESOLUTIONS = (
+    ('minute', 60),
+    ('hour', 3600),
+    ('day', 86400),
+)
+_RESOLUTION_SIZES = dict(RESOLUTIONS)
+
+# 每个桶中保存的指标：微博数、转发数、评论数、点赞数
+METRICS = ('微博数', '转发数', '评论数', '点赞数')
+
+_ABSOLUTE_RE = re.compile(
+    r'^(?:(\d{4})[-/年])?(\d{1,2})[-/月](\d{1,2})日?(?:\s*(\d{1,2}):(\d{1,2})(?::(\d{1,2}))?)?$')
+_RELATIVE_RE = re.compile(r'^(\d+)\s*(秒|分钟|小时|天)前$')
+_DAY_WORD_RE = re.compile(r'^(今天|昨天|前天)\s*(\d{1,2}):(\d{1,2})$')
+_RELATIVE_UNITS = {'秒': 1, '分钟': 60, '小时': 3600, '天': 86400}
+_DAY_WORDS = {'今天': 0, '昨天': 1, '前天': 2}
+
+
+def parse_publish_time(text, now=None):
+    """把微博的发布时间字符串解析为datetime，无法解析时返回None
+
+    支持 "2024-05-01 12:30"、"05月01日 12:30"、"今天 12:30"、"5分钟前"、"刚刚" 等格式。
+    """
+    if text is None:
+        return None
+    text = str(text).strip()
+    if not text or text == 'N/A':
+        return None
+    if now is None:
+        now = datetime.now()
+
+    if text == '刚刚':
+        return now.replace(microsecond=0)
+
+    match = _RELATIVE_RE.match(text)
+    if match:
+        seconds = int(match.group(1)) * _RELATIVE_UNITS[match.group(2)]
+        return now.replace(microsecond=0) - timedelta(seconds=seconds)
+
+    match = _DAY_WORD_RE.match(text)
+    if match:
+        day = now.date() - timedelta(days=_DAY_WORDS[match.group(1)])
+        return datetime(day.year, day.month, day.day, int(match.group(2)), int(match.group(3)))
+
+    match = _ABSOLUTE_RE.match(text)
+    if match:
+        year, month, day, hour, minute, second = match.groups()
+        try:
+            parsed = datetime(int(year) if year else now.year, int(month), int(day),
+                              int(hour or 0), int(minute or 0), int(second or 0))
+        except ValueError:
+            return None
+        # 省略年份且日期晚于当前时间，说明是去年发布的
+        if not year and parsed > now + timedelta(days=1):
+            parsed = parsed.replace(year=parsed.year - 1)
+        return parsed
+
+    return None
+
+
+def parse_publish_times(values, now=None):
+    """批量解析发布时间，返回与values等长的datetime列表（无法解析的为None）
+
+    同一批数据使用同一个当前时间解析相对时间，相同字符串只解析一次。
+    """
+    if now is None:
+        now = datetime.now()
+    cache = {}
+    parsed = []
+    for text in values:
+        if text not in cache:
+            cache[text] = parse_publish_time(text, now)
+        parsed.append(cache[text])
+    return parsed
+
+
+def to_timestamp(dt):
+    """把datetime转换为整数秒（按本地时间直接计算，不做时区换算）"""
+    return int((dt - _EPOCH).total_seconds())
+
+
+def from_timestamp(ts):
+    """把整数秒转换回datetime"""
+    return _EPOCH + timedelta(seconds=ts)
+
+
+class TimeRollup:
+    """多分辨率时间桶汇总
+
+    每条微博写入时同时累加到分钟、小时、天三个分辨率的时间桶，
+    并按"全部"、关键词、作者三个维度分别汇总。查询时直接读取桶，
+    不需要重新解析原始数据。
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """清空所有时间桶"""
+        # 分辨率 -> 维度 -> {桶起始秒: [微博数, 转发数, 评论数, 点赞数]}
+        self._levels = {name: {} for name, _ in RESOLUTIONS}
+        self.start = None
+        self.end = None
+        self.count = 0
+
+    def add(self, ts, reposts=0, comments=0, likes=0, keyword=None, author=None, overall=True):
+        """写入一条微博（ts为整数秒时间戳）
+
+        overall=False 时不写入"全部"维度，也不计入总数，用于已写入过的微博又出现在另一个关键词的结果中。
+        """
+        dimensions = [None] if overall else []
+        if keyword is not None:
+            dimensions.append(('keyword', keyword))
+        if author is not None:
+            dimensions.append(('author', author))
+
+        for name, size in RESOLUTIONS:
+            bucket = ts - ts % size
+            level = self._levels[name]
+            for dimension in dimensions:
+                buckets = level.get(dimension)
+                if buckets is None:
+                    buckets = level[dimension] = {}
+                values = buckets.get(bucket)
+                if values is None:
+                    buckets[bucket] = [1, reposts, comments, likes]
+                else:
+                    values[0] += 1
+                    values[1] += reposts
+                    values[2] += comments
+                    values[3] += likes
+
+        if not overall:
+            return
+        self.count += 1
+        if self.start is None or ts < self.start:
+            self.start = ts
+        if self.end is None or ts > self.end:
+            self.end = ts
+
+    def _buckets(self, resolution, keyword=None, author=None):
+        if keyword is not None and author is not None:
+            raise ValueError("keyword 和 author 不能同时指定")
+        if keyword is not None:
+            dimension = ('keyword', keyword)
+        elif author is not None:
+            dimension = ('author', author)
+        else:
+            dimension = None
+        return self._levels[resolution].get(dimension, {})
+
+    def choose_resolution(self, start, end, max_points=200):
+        """选择桶数量不超过max_points的最细分辨率"""
+        for name, size in RESOLUTIONS:
+            if (end - start) / size <= max_points:
+                return name
+        return RESOLUTIONS[-1][0]
+
+    def series(self, start, end, resolution=None, keyword=None, author=None, max_points=200):
+        """返回[start, end)范围内每个时间桶的汇总，空桶补零
+
+        返回值为 (桶起始秒, [微博数, 转发数, 评论数, 点赞数]) 列表。
+        """
+        if resolution is None:
+            resolution = self.choose_resolution(start, end, max_points)
+        size = _RESOLUTION_SIZES[resolution]
+        buckets = self._buckets(resolution, keyword, author)
+
+        result = []
+        bucket = start - start % size
+        while bucket < end:
+            values = buckets.get(bucket)
+            result.append((bucket, list(values) if values else [0, 0, 0, 0]))
+            bucket += size
+        return result
+
+    def totals(self, start, end, keyword=None, author=None):
+        """汇总起始秒落在[start, end)内的分钟桶，尽量使用能覆盖区间的最粗分辨率
+
+        最细只到分钟，不在整分钟上的边界向后对齐到下一个整分钟，
+        因此相邻区间不会重复统计同一条微博。
+        """
+        levels = [(size, self._buckets(name, keyword, author)) for name, size in reversed(RESOLUTIONS)]
+        finest = RESOLUTIONS[0][1]
+
+        totals = [0, 0, 0, 0]
+        cursor = start + (-start) % finest
+        end += (-end) % finest
+        while cursor < end:
+            for size, buckets in levels:
+                if cursor % size == 0 and cursor + size <= end or size == finest:
+                    values = buckets.get(cursor)
+                    if values:
+                        for i, value in enumerate(values):
+                            totals[i] += value
+                    cursor += size
+                    break
+        return totals
+
+    def hour_of_day(self, keyword=None, author=None):
+        """按一天中的小时（0-23）汇总微博数，基于小时桶计算"""
+        counts = [0] * 24
+        for bucket, values in self._buckets('hour', keyword, author).items():
+            counts[bucket // 3600 % 24] += values[0]
+        return counts
+
+    def detect_spikes(self, start, end, resolution='hour', window=24, threshold=3.0, min_count=5,
+                      keyword=None, author=None):
+        """基于滑动窗口均值和标准差检测微博数突增的时间桶
+
+        返回 (桶起始秒, 微博数, 基线均值, z分数) 列表。
+        """
+        history = deque(maxlen=window)
+        spikes = []
+        for bucket, values in self.series(start, end, resolution, keyword, author):
+            count = values[0]
+            if len(history) >= max(window // 2, 2):
+                mean = sum(history) / len(history)
+                std = math.sqrt(sum((x - mean) ** 2 for x in history) / len(history))
+                # 标准差至少取1，避免平稳期的小波动被误判为突增
+                score = (count - mean) / max(std, 1.0)
+                if count >= min_count and score >= threshold:
+                    spikes.append((bucket, count, round(mean, 2), round(score, 2)))
+            history.append(count)
+        return spikes